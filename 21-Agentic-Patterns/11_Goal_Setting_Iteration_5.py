@@ -0,0 +1,440 @@
+# MIT License
+# Copyright (c) 2025 Mahtab Syed
+# https://www.linkedin.com/in/mahtabsyed/
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so.
+
+"""
+Hands-On Code Example - Iteration 5
+- To illustrate the Goal Setting and Monitoring pattern, we have an example using LangChain and OpenAI APIs:
+
+Objective: Build an AI Agent which can write code for a specified use case based on specified goals:
+- Accepts a coding problem (use case) in code or can be as input.
+- Accepts a list of goals (e.g., "simple", "tested", "handles edge cases")  in code or can be input.
+- Uses an LLM (like GPT-4o) to generate and refine Python code until the goals are met. (I am using max 5 iterations, this could be based on a set goal as well)
+- To check if we have met our goals I am asking the LLM to judge this and answer with a confidence score 1-10, which makes it easier to stop the iterations.
+- Saves the final code in a .py file with a clean filename and a header comment.
+
+Changes from Iteration 4 - fewer LLM round-trips per iteration:
+- Critique and confidence score come back from ONE structured review call (was get_code_feedback + goals_met).
+- Generated code is first test-run in a subprocess with a timeout (not a security sandbox). Syntax or runtime errors
+  become the feedback for the next iteration directly, without spending a review call.
+- The filename is derived locally from the use case (was an extra LLM call).
+- Best-of-N mode (run_code_agent_best_of_n, or `--best-of-n N` on the CLI): each round generates N
+  candidates concurrently, test-runs and reviews them in parallel, and refines only the best one,
+  within a concurrency limit and an LLM call / token budget.
+- Refinement prompts are built by RefinementContext (refinement_context.py): the latest code in full,
+  its feedback trimmed to a token budget, and earlier rounds only as unified diffs with one-line
+  critique summaries, which only fill the tokens saved by trimming the feedback, so a prompt is
+  never larger than Iteration 4's. The prompt tokens saved are printed at the end of a run.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from dotenv import load_dotenv, find_dotenv
+from langchain_openai import ChatOpenAI
+from openai import OpenAIError
+import requests
+
+from refinement_context import RefinementContext
+
+try:
+    import resource
+except ImportError:  # Windows: the test run is only bounded by its timeout
+    resource = None
+
+# 🔐 Load environment variables
+_ = load_dotenv(find_dotenv())
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+if not OPENAI_API_KEY:
+    raise EnvironmentError("❌ Please set the OPENAI_API_KEY environment variable.")
+
+# ✅ Initialize LLM
+print("📡 Initializing OpenAI LLM (gpt-4o)...")
+llm = ChatOpenAI(model="gpt-4o", temperature=0.3, openai_api_key=OPENAI_API_KEY)
+
+# --- Utility: LLM Budget ---
+class LLMBudget:
+    """Thread-safe count of LLM calls and tokens spent, with optional limits."""
+
+    def __init__(self, max_calls: int = None, max_tokens: int = None):
+        self.max_calls = max_calls
+        self.max_tokens = max_tokens
+        self.calls = 0
+        self.tokens = 0
+        self._lock = threading.Lock()
+
+    def charge(self, response_obj):
+        usage = getattr(response_obj, "usage_metadata", None) or {}
+        with self._lock:
+            self.calls += 1
+            self.tokens += usage.get("total_tokens", 0)
+
+    def can_afford(self, calls: int) -> bool:
+        with self._lock:
+            if self.max_calls is not None and self.calls + calls > self.max_calls:
+                return False
+            return self.max_tokens is None or self.tokens < self.max_tokens
+
+# --- Utility: Safe LLM Call ---
+def safe_llm_invoke(prompt: str, max_retries: int = 3, delay: float = 1.0, budget: LLMBudget = None, **invoke_kwargs):
+    for attempt in range(max_retries):
+        try:
+            response_obj = llm.invoke(prompt, **invoke_kwargs)
+            if budget is not None:
+                budget.charge(response_obj)
+            return response_obj
+        except (OpenAIError, requests.exceptions.RequestException) as e:
+            print(f"⚠️ LLM call failed (attempt {attempt + 1}/{max_retries}): {e}")
+            if attempt < max_retries - 1:
+                time.sleep(delay)
+                delay *= 2
+            else:
+                print("❌ Maximum retries reached. Skipping this step.")
+                return None
+
+# --- Prompt Builders ---
+def generate_prompt(use_case: str, goals: list[str], previous_code: str = "", feedback: str = "", history: str = "") -> str:
+    print("📝 Constructing prompt for code generation...")
+    base_prompt = f"""
+    You are an AI coding agent. Your job is to write Python code based on the following use case:
+
+    Use Case: {use_case}
+
+    Your goals are:
+    {chr(10).join(f"- {g.strip()}" for g in goals)}
+    """
+    if previous_code:
+        print("🔄 Adding previous code to the prompt for refinement.")
+        base_prompt += f"\nPreviously generated code:\n{previous_code}"
+    if feedback:
+        print("📋 Including feedback for revision.")
+        base_prompt += f"\nFeedback on previous version:\n{feedback}\n"
+    if history:
+        print("🗂️ Including diffs of earlier rounds.")
+        base_prompt += f"\nChanges made in earlier rounds (unified diffs):\n{history}\n"
+
+    base_prompt += "\nPlease return only the revised Python code. Do not include comments or explanations outside the code."
+    return base_prompt
+
+def review_code(code: str, goals: list[str], budget: LLMBudget = None) -> tuple[str, int]:
+    """
+    Critiques the code and scores it in a single LLM call.
+    Returns a tuple: (feedback_text, confidence_score); (None, 0) if the call failed.
+    """
+    print("🔍 Reviewing code against the goals (critique + score in one call)...")
+    review_prompt = f"""
+    You are a Python code reviewer. A code snippet is shown below. Based on the following goals:
+
+    {chr(10).join(f"- {g.strip()}" for g in goals)}
+
+    Please critique this code and identify if the goals are met. Mention if improvements are needed for clarity, simplicity, correctness, edge case handling, or test coverage.
+    Then evaluate how well the goals have been met on a confidence scale from 1 to 10,
+    where 1 means "not met at all" and 10 means "fully met with no changes needed".
+
+    Respond ONLY with raw JSON, without code fences:
+    {{"critique": "<your critique>", "score": <1-10>}}
+
+    Code:
+    {code}
+    """
+    response_obj = safe_llm_invoke(review_prompt, budget=budget)
+    if not response_obj:
+        return (None, 0)
+
+    response = response_obj.content.strip()
+    try:
+        result = json.loads(response[response.find("{"):response.rfind("}") + 1])
+        feedback_text, score = str(result["critique"]).strip(), int(result["score"])
+    except (ValueError, KeyError, TypeError):
+        # Fall back to the last number in the answer, as Iteration 4 did for the score
+        numbers = re.findall(r"\b(10|[1-9])\b", response)
+        feedback_text, score = response, int(numbers[-1]) if numbers else 0
+        print(f"⚠️ Review was not valid JSON, parsed score {score} from text.")
+    print(f"📊 Confidence score returned by LLM: {score}/10")
+    return (feedback_text, score)
+
+# --- Test run ---
+# "Usage: python script.py <file.docx>" or argparse's "usage: ..." on a run without arguments
+USAGE_MESSAGE = re.compile(r"^\s*usage:", re.IGNORECASE | re.MULTILINE)
+SUBPROCESS_CPU_SECONDS = 30
+SUBPROCESS_MAX_FILE_BYTES = 50 * 1024**2
+
+def _limit_resources():
+    # CPU seconds and size of any file written; applied in the child before it starts (POSIX only)
+    resource.setrlimit(resource.RLIMIT_CPU, (SUBPROCESS_CPU_SECONDS, SUBPROCESS_CPU_SECONDS))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (SUBPROCESS_MAX_FILE_BYTES, SUBPROCESS_MAX_FILE_BYTES))
+
+def run_in_subprocess(code: str, timeout: float = 10.0) -> tuple[bool, str]:
+    """
+    Compiles the code, then runs it in a separate Python subprocess with a temporary working
+    directory, a minimal environment, a timeout and (on POSIX) CPU-time and file-size limits.
+    This is NOT a security sandbox: the program can still read, write and delete anything the
+    user can and use the network, so only run code you would run yourself.
+    Returns (ok, output). A program that is still running at the timeout (a game loop, a server),
+    that stops waiting for keyboard input, or that needs command-line arguments and exits with
+    its usage message counts as ok: it did not crash.
+    """
+    try:
+        compile(code, "<generated>", "exec")
+    except SyntaxError as e:
+        return (False, f"SyntaxError: {e}")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        script = Path(work_dir) / "candidate.py"
+        script.write_text(code)
+        env = {
+            "PATH": os.environ.get("PATH", ""),
+            "SDL_VIDEODRIVER": "dummy",  # Pygame programs run headless
+            "SDL_AUDIODRIVER": "dummy",
+        }
+        # Needed to find `pip install --user` packages (and, on Windows, to start at all)
+        for name in ("HOME", "USERPROFILE", "APPDATA", "SYSTEMROOT"):
+            if name in os.environ:
+                env[name] = os.environ[name]
+        try:
+            proc = subprocess.run(
+                # -E ignores PYTHON* variables but, unlike -I, keeps the user site-packages
+                [sys.executable, "-E", str(script)],
+                cwd=work_dir,
+                env=env,
+                stdin=subprocess.DEVNULL,
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+                preexec_fn=_limit_resources if resource is not None else None,
+            )
+        except subprocess.TimeoutExpired:
+            return (True, f"Still running after {timeout}s (no crash).")
+
+    output = (proc.stdout + proc.stderr).strip()
+    if proc.returncode == 0 or "EOFError" in proc.stderr:
+        return (True, output)
+    if "Traceback" not in proc.stderr and USAGE_MESSAGE.search(output):
+        return (True, f"Exited with a usage message (needs command-line arguments):\n{output[-2000:]}")
+    return (False, output[-2000:])
+
+# --- Helpers ---
+def clean_code_block(code: str) -> str:
+    lines = code.strip().splitlines()
+    if lines and lines[0].strip().startswith("```"):
+        lines = lines[1:]
+    if lines and lines[-1].strip() == "```":
+        lines = lines[:-1]
+    return "\n".join(lines).strip()
+
+def add_comment_header(code: str, use_case: str) -> str:
+    comment = f"# This Python program implements the following use case:\n# {use_case.strip()}\n"
+    return comment + "\n" + code
+
+FILENAME_STOPWORDS = {
+    "write", "code", "create", "simple", "program", "python", "which", "that", "the", "and",
+    "with", "for", "from", "into", "of", "a", "an", "to", "in", "it", "its", "all", "number",
+    "given", "find", "count", "takes", "input", "print", "prints", "use", "using", "my", "many",
+}
+
+def short_name_for(use_case: str) -> str:
+    """Picks a filename stem from the use case locally: the first meaningful words, max 10 characters."""
+    words = [w for w in re.findall(r"[a-z0-9]+", use_case.lower()) if w not in FILENAME_STOPWORDS and len(w) > 2]
+    short_name = ""
+    for word in words:
+        if len(short_name) + len(word) > 10:
+            break
+        short_name += word
+    return short_name or (words[0][:10] if words else "autogen")
+
+def save_code_to_file(code: str, use_case: str) -> str:
+    print("💾 Saving final code to file...")
+
+    short_name = short_name_for(use_case)
+    random_suffix = str(random.randint(1000, 9999))
+    filename = f"{short_name}_{random_suffix}.py"
+    filepath = Path.cwd() / filename
+
+    with open(filepath, "w") as f:
+        f.write(code)
+
+    print(f"✅ Code saved to: {filepath}")
+    return str(filepath)
+
+# --- Main Loop ---
+def run_code_agent(use_case: str, goals_input: str, max_iterations: int = 5, context_tokens: int = 4000) -> str:
+    goals = [g.strip() for g in goals_input.split(",")]
+
+    print(f"\n🎯 Use Case: {use_case}")
+    print("🎯 Goals:")
+    for g in goals:
+        print(f"  - {g}")
+
+    context = RefinementContext(token_budget=context_tokens)
+    code = None
+
+    for i in range(max_iterations):
+        print(f"\n=== 🔁 Iteration {i + 1} of {max_iterations} ===")
+        prompt = generate_prompt(use_case, goals, *context.build())
+
+        print("🚧 Generating code...")
+        response_obj = safe_llm_invoke(prompt)
+        if not response_obj:
+            print("❌ Code generation failed. Skipping iteration.")
+            continue
+
+        raw_code = response_obj.content.strip()
+        code = clean_code_block(raw_code)
+        print("\n🧾 Generated Code:\n" + "-" * 50 + f"\n{code}\n" + "-" * 50)
+
+        print("\n🧪 Test-running the code in a subprocess...")
+        ok, output = run_in_subprocess(code)
+        if not ok:
+            # No review call needed: the error itself is the feedback
+            print("💥 Code failed in the test run. Skipping review.\n" + "-" * 50 + f"\n{output}\n" + "-" * 50)
+            context.add_round(code, f"The code failed when executed:\n{output}\nFix this error.")
+            continue
+
+        print("\n📤 Submitting code for review...")
+        feedback, score = review_code(code, goals)
+        if not feedback:
+            print("❌ Review failed. Skipping iteration.")
+            continue
+
+        print("\n📥 Feedback Received:\n" + "-" * 50 + f"\n{feedback}\n" + "-" * 50)
+        print(f"📈 Confidence Score: {score}/10")
+        if score >= 8:
+            print("✅ LLM confirms goals are met. Stopping iteration.")
+            break
+
+        print("🛠️ Goals not fully met. Preparing for next iteration...")
+        context.add_round(code, feedback)
+
+    print(f"🧮 {context.report()}")
+    if code is None:
+        print("❌ No code was generated.")
+        return None
+    final_code = add_comment_header(code, use_case)
+    return save_code_to_file(final_code, use_case)
+
+# --- Best-of-N Mode ---
+def evaluate_candidate(prompt: str, goals: list[str], temperature: float, budget: LLMBudget) -> dict:
+    """Generates one candidate, test-runs it and (only if it runs) reviews it."""
+    response_obj = safe_llm_invoke(prompt, budget=budget, temperature=temperature)
+    if not response_obj:
+        return None
+    code = clean_code_block(response_obj.content.strip())
+    ok, output = run_in_subprocess(code)
+    if not ok:
+        return {"code": code, "score": 0, "feedback": f"The code failed when executed:\n{output}\nFix this error."}
+    feedback, score = review_code(code, goals, budget=budget)
+    return {"code": code, "score": score, "feedback": feedback or ""}
+
+def run_code_agent_best_of_n(
+    use_case: str,
+    goals_input: str,
+    n_candidates: int = 3,
+    max_rounds: int = 5,
+    max_concurrency: int = 3,
+    max_llm_calls: int = 30,
+    max_tokens: int = None,
+    context_tokens: int = 4000,
+) -> str:
+    """
+    Like run_code_agent, but every round generates `n_candidates` versions concurrently
+    (slightly different temperatures), scores them in parallel and refines only the best.
+    Stops when a candidate reaches 8/10, after `max_rounds`, or when the budget cannot pay for a full round.
+    """
+    goals = [g.strip() for g in goals_input.split(",")]
+    budget = LLMBudget(max_calls=max_llm_calls, max_tokens=max_tokens)
+
+    print(f"\n🎯 Use Case: {use_case}")
+    print(f"🎯 Goals: {', '.join(goals)}")
+    print(f"🧮 {n_candidates} candidates per round, concurrency {max_concurrency}, budget {max_llm_calls} calls")
+
+    best = {"code": "", "score": -1, "feedback": ""}
+    context = RefinementContext(token_budget=context_tokens)
+    started = time.time()
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        for i in range(max_rounds):
+            # A full round costs at most one generate + one review call per candidate
+            if not budget.can_afford(2 * n_candidates):
+                print("💸 Budget exhausted. Stopping.")
+                break
+            print(f"\n=== 🔁 Round {i + 1} of {max_rounds} ===")
+            prompt = generate_prompt(use_case, goals, *context.build())
+            temperatures = [min(1.0, 0.3 + 0.2 * k) for k in range(n_candidates)]
+            candidates = [c for c in pool.map(lambda t: evaluate_candidate(prompt, goals, t, budget), temperatures) if c]
+            if not candidates:
+                print("❌ All candidates failed. Skipping round.")
+                continue
+
+            round_best = max(candidates, key=lambda c: c["score"])
+            print(f"📈 Scores: {[c['score'] for c in candidates]} -> best {round_best['score']}/10")
+            if round_best["score"] > best["score"]:
+                best = round_best
+            if best["score"] >= 8:
+                print("✅ LLM confirms goals are met. Stopping.")
+                break
+
+            print("🛠️ Refining from the best candidate...")
+            context.add_round(best["code"], best["feedback"])
+
+    print(f"⏱️ {time.time() - started:.1f}s, {budget.calls} LLM calls, {budget.tokens} tokens")
+    print(f"🧮 {context.report()}")
+    if not best["code"]:
+        print("❌ No code was generated.")
+        return None
+    final_code = add_comment_header(best["code"], use_case)
+    return save_code_to_file(final_code, use_case)
+
+# --- CLI Test Run ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI code generation agent (goal setting and monitoring)")
+    parser.add_argument("--best-of-n", type=int, metavar="N", default=None,
+                        help="generate and review N candidates concurrently per round")
+    args = parser.parse_args()
+    if args.best_of_n is not None and args.best_of_n < 1:
+        parser.error("--best-of-n must be at least 1")
+
+    print("\n🧠 Welcome to the AI Code Generation Agent")
+
+    # Example 1
+    # use_case_input = "Write code to find BinaryGap of a given positive integer"
+    # goals_input = "Code simple to understand, Functionally correct, Handles comprehensive edge cases, Takes positive integer input only, prints the results with few examples"
+    # run_code_agent(use_case_input, goals_input)
+
+
+    # Example 2
+    use_case_input = "Write code to count the number of files in current directory and all its nested sub directories, and print the total count"
+    goals_input = (
+        "Code simple to understand, Functionally correct, Handles comprehensive edge cases, Ignore recommendations for performance, Ignore recommendations for test suite use like unittest or pytest"
+    )
+    if args.best_of_n:
+        run_code_agent_best_of_n(use_case_input, goals_input, n_candidates=args.best_of_n, max_concurrency=args.best_of_n)
+    else:
+        run_code_agent(use_case_input, goals_input)
+
+
+    # Example 3
+    # use_case_input = "Write code which takes a command line input of a word doc or docx file and opens it and counts the number of words, and characters in it and prints all"
+    # goals_input = "Code simple to understand, Functionally correct, Handles edge cases"
+    # run_code_agent(use_case_input, goals_input)
+
+    # Example 4
+    # use_case_input = "Write code to create a simple car race game with my car and many other moving cars on different lanes like a real race. Use Pygame library for this. The game should have a simple GUI, a scoreboard with time remaining and lives remaining, and should handle edge cases like collisions and out of bounds. The road should be a simple straight road with lanes, and the player car should be controlled by arrow keys. The game should end when the player runs out of lives or time."
+    # goals_input = "Code simple to understand, Functionally correct, Handles edge cases, Uses Pygame library, Has a simple GUI, Has a scoreboard with time remaining and lives remaining"
+    # run_code_agent(use_case_input, goals_input)
+
+
@@ -0,0 +1,123 @@
+# 14 - Knowledge Retrieval (RAG)
+## RAG with LangChain + LangGraph on an in-process vector store
+# - Same retrieve -> generate graph as 14_RAG_LangChain.ipynb, but the chunks are indexed in
+#   rag.vector_store.LocalVectorStore instead of an embedded Weaviate server.
+# - The index is memory-mapped from ./rag_index, so after the first run the retriever starts instantly.
+# - Ingestion embeds only chunks whose content hash is not in ./embedding_cache.sqlite,
+#   so re-running on an unchanged corpus makes no embedding calls.
+# - Retrieval is hybrid: BM25 over the chunks fused with vector results, and keyword-only when
+#   the lexical match is decisive (exact names), which skips embedding the question.
+# - `cached_app` answers reworded repeats of a question from a semantic answer cache
+#   when retrieval still returns the same documents.
+# - Set RAG_EMBEDDINGS=local to use the offline hashing embeddings instead of OpenAIEmbeddings.
+
+import os
+from typing import List, TypedDict
+
+import dotenv
+from langchain.prompts import ChatPromptTemplate
+from langchain.text_splitter import CharacterTextSplitter
+from langchain_community.document_loaders import TextLoader
+from langchain_core.documents import Document
+from langchain_core.output_parsers import StrOutputParser
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langgraph.graph import END, StateGraph
+
+from rag.answer_cache import CachedRAGApp, SemanticAnswerCache
+from rag.hybrid import HybridRetriever
+from rag.ingestion import EmbeddingCache, ingest
+from rag.vector_store import HashingEmbeddings, LocalVectorStore
+
+# Load environment variables (e.g., OPENAI_API_KEY)
+dotenv.load_dotenv()
+
+INDEX_DIR = "rag_index"
+EMBEDDING_CACHE = "embedding_cache.sqlite"
+
+# --- 1. Data Preparation (Preprocessing) ---
+if os.getenv("RAG_EMBEDDINGS", "openai") == "local":
+    embeddings = HashingEmbeddings()
+else:
+    embeddings = OpenAIEmbeddings()
+
+vectorstore = LocalVectorStore(embeddings, persist_directory=INDEX_DIR)
+
+# Stream, chunk and embed only new or changed chunks
+text_splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=50)
+stats = ingest(
+    TextLoader("./state_of_the_union.txt").lazy_load(),
+    text_splitter,
+    embeddings,
+    vectorstore,
+    EmbeddingCache(EMBEDDING_CACHE),
+)
+print(f"Ingestion: {stats}")
+
+# Define the retriever: BM25 index precomputed over the indexed chunks + dense search
+retriever = HybridRetriever.from_vectorstore(vectorstore)
+
+# Initialize LLM
+llm = ChatOpenAI(model_name="gpt-4o-mini", temperature=0)
+
+
+# --- 2. Define the State for LangGraph ---
+class RAGGraphState(TypedDict):
+    question: str
+    documents: List[Document]
+    generation: str
+
+
+# --- 3. Define the Nodes (Functions) ---
+def retrieve_documents_node(state: RAGGraphState) -> RAGGraphState:
+    """Retrieves documents based on the user's question."""
+    question = state["question"]
+    # The answer cache passes in the documents it already retrieved for its freshness check
+    documents = state.get("documents") or retriever.invoke(question)
+    return {"documents": documents, "question": question, "generation": ""}
+
+
+def generate_response_node(state: RAGGraphState) -> RAGGraphState:
+    """Generates a response using the LLM based on retrieved documents."""
+    question = state["question"]
+    documents = state["documents"]
+
+    template = """You are an assistant for question-answering tasks.
+Use the following pieces of retrieved context to answer the question.
+If you don't know the answer, just say that you don't know.
+Use three sentences maximum and keep the answer concise.
+Question: {question}
+Context: {context}
+Answer:
+"""
+    prompt = ChatPromptTemplate.from_template(template)
+    context = "\n\n".join([doc.page_content for doc in documents])
+    rag_chain = prompt | llm | StrOutputParser()
+    generation = rag_chain.invoke({"context": context, "question": question})
+    return {"question": question, "documents": documents, "generation": generation}
+
+
+# --- 4. Build the LangGraph Graph ---
+workflow = StateGraph(RAGGraphState)
+workflow.add_node("retrieve", retrieve_documents_node)
+workflow.add_node("generate", generate_response_node)
+workflow.set_entry_point("retrieve")
+workflow.add_edge("retrieve", "generate")
+workflow.add_edge("generate", END)
+app = workflow.compile()
+
+# Semantic cache in front of the graph: similar question + same documents -> cached answer
+cached_app = CachedRAGApp(app, retriever, SemanticAnswerCache(embeddings, threshold=0.92, ttl=3600))
+
+
+# --- 5. Run the RAG Application ---
+if __name__ == "__main__":
+    print("\n--- Running RAG Query ---")
+    query = "What did the president say about Justice Breyer. Answer in less than 100 words."
+    result = cached_app.invoke({"question": query})
+    print("\nAnswer:\n", result["generation"])
+
+    print("\n--- Running a reworded RAG Query ---")
+    query_2 = "What did the president say about Justice Breyer? Answer in less than 100 words."
+    result_2 = cached_app.invoke({"question": query_2})
+    print("\nAnswer:\n", result_2["generation"])
+    print(f"\nCache: {cached_app.cache.stats}, hit rate {cached_app.cache.stats.hit_rate:.0%}")
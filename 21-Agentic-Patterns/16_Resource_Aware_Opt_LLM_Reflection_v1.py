@@ -1,4 +1,6 @@
+import asyncio
 import os
+import sys
 import requests
 from dotenv import load_dotenv
 from langchain.prompts import ChatPromptTemplate
@@ -7,11 +9,16 @@ import json
 # Use updated imports as per LangChain deprecation warning
 from langchain_openai import ChatOpenAI
 
+from query_classifier import RoutedClassifier
+from speculative_router import route
+
 # Load .env variables
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")
+# Point at local_search_server.py to benchmark without the real API
+GOOGLE_SEARCH_URL = os.getenv("GOOGLE_SEARCH_URL", "https://www.googleapis.com/customsearch/v1")
 
 if not OPENAI_API_KEY or not GOOGLE_API_KEY or not GOOGLE_CSE_ID:
     raise ValueError("Please set OPENAI_API_KEY, GOOGLE_API_KEY, and GOOGLE_CSE_ID in your .env file.")
@@ -44,16 +51,44 @@ classifier_llm = ChatOpenAI(
 )
 classification_chain = classification_prompt | classifier_llm
 
+# LLM classifier, parsed into (classification, reasoning)
+def llm_classify(user_prompt):
+    classification_result = classification_chain.invoke({"user_prompt": user_prompt})
+    # If result is an object with 'content', extract it
+    if hasattr(classification_result, "content"):
+        classification_result = classification_result.content
+    try:
+        # Remove code block markers and leading/trailing whitespace
+        if classification_result.strip().startswith("```") and classification_result.strip().endswith("```"):
+            classification_result = classification_result.strip()[3:-3].strip()
+        elif classification_result.strip().startswith("```"):
+            classification_result = classification_result.strip()[3:].strip()
+        elif classification_result.strip().endswith("```"):
+            classification_result = classification_result.strip()[:-3].strip()
+
+        # Find the first and last curly braces to extract the JSON substring
+        start = classification_result.find('{')
+        end = classification_result.rfind('}') + 1
+        json_str = classification_result[start:end]
+        result = json.loads(json_str)
+        return result["classification"], result["reasoning"]
+    except Exception as e:
+        raise ValueError(f"Failed to parse classifier output: {e}\nRaw output: {classification_result}") from e
+
+# Local hashed n-gram classifier (query_classifier.npz, trained from classification_log.jsonl
+# with evaluate_query_classifier.py --save); the LLM is only asked below the confidence threshold
+router = RoutedClassifier.from_files(llm_classify, threshold=float(os.getenv("CLASSIFIER_THRESHOLD", "0.85")))
+
 # Google search using Custom Search API
 def google_search(query, api_key, cse_id, num_results=5):
-    url = "https://www.googleapis.com/customsearch/v1"
+    url = GOOGLE_SEARCH_URL
     params = {
         "key": api_key,
         "cx": cse_id,
         "q": query,
         "num": num_results
     }
-    response = requests.get(url, params=params)
+    response = requests.get(url, params=params, timeout=30)
     results = response.json()
     return [item['snippet'] for item in results.get("items", [])]
 
@@ -85,31 +120,13 @@ Prompt: {user_prompt}
 
 # Entry point
 def main(user_prompt):
-    classification_result = classification_chain.invoke({"user_prompt": user_prompt})
     try:
-        # If result is an object with 'content', extract it
-        if hasattr(classification_result, "content"):
-            classification_result = classification_result.content
-        # Remove code block markers and leading/trailing whitespace
-        if classification_result.strip().startswith("```") and classification_result.strip().endswith("```"):
-            classification_result = classification_result.strip()[3:-3].strip()
-        elif classification_result.strip().startswith("```"):
-            classification_result = classification_result.strip()[3:].strip()
-        elif classification_result.strip().endswith("```"):
-            classification_result = classification_result.strip()[:-3].strip()
-
-        # Find the first and last curly braces to extract the JSON substring
-        start = classification_result.find('{')
-        end = classification_result.rfind('}') + 1
-        json_str = classification_result[start:end]
-        result = json.loads(json_str)
-        classification = result["classification"]
-        reasoning = result["reasoning"]
-    except Exception as e:
-        return {"error": f"Failed to parse classifier output: {e}\nRaw output: {classification_result}"}
+        classification, reasoning, source = router.classify(user_prompt)
+    except ValueError as e:
+        return {"error": str(e)}
 
     google_results = None
-    if classification.startswith("Needs Google"):
+    if "google" in classification.lower():
         google_results = google_search(user_prompt, GOOGLE_API_KEY, GOOGLE_CSE_ID)
 
     final_response = generate_response(user_prompt, classification, google_results)
@@ -117,13 +134,30 @@ def main(user_prompt):
     return {
         "classification": classification,
         "reasoning": reasoning,
+        "classified_by": source,
         "response": final_response
     }
 
+# Async entry point: for prompts that look search-bound, the search starts
+# in parallel with classification and is discarded if it turns out unnecessary
+async def main_async(user_prompt):
+    try:
+        return await route(
+            user_prompt,
+            router.classify,
+            lambda prompt: google_search(prompt, GOOGLE_API_KEY, GOOGLE_CSE_ID),
+            generate_response,
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+
 # Example usage
 if __name__ == "__main__":
     user_prompt = input("Enter a prompt: ")
-    result = main(user_prompt)
+    if "--speculative" in sys.argv:
+        result = asyncio.run(main_async(user_prompt))
+    else:
+        result = main(user_prompt)
     if "error" in result:
         print("\n=== Error ===")
         print(result["error"])
@@ -133,3 +167,5 @@ if __name__ == "__main__":
         print("\n=== Reasoning ===")
         print(result["reasoning"])
         print(result["response"])
+        if "timings" in result:
+            print(f"\n=== Timings ===\n{result['timings']} (speculative search: {result['speculative']}, used: {result['search_used']})")
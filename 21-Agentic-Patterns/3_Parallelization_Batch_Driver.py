@@ -0,0 +1,159 @@
+"""
+Batch driver for the map -> synthesis chain from 3_Parallelization_Langchain.ipynb.
+
+Runs the summary / questions / key_terms branches and the synthesis step for thousands of
+topics read from a file (one topic per line):
+
+- Topics go through the chain with `abatch_as_completed` (the streaming form of `abatch`).
+- Every LLM call, from any branch of any topic, first takes a slot from ONE shared semaphore,
+  so `--concurrency` is the real number of requests in flight, not topics x branches.
+- Each topic is appended to the JSONL output as soon as it finishes. Re-running with the same
+  output file skips topics that already succeeded.
+
+Usage:
+    python 3_Parallelization_Batch_Driver.py topics.txt results.jsonl --concurrency 32
+    python 3_Parallelization_Batch_Driver.py topics.txt results.jsonl --fake-latency 0.5   # no API calls
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda, RunnableParallel, RunnablePassthrough
+
+
+def limited(llm, semaphore: asyncio.Semaphore):
+    """`llm` behind a shared semaphore: at most semaphore-size calls run at once across all chains."""
+    async def call(messages):
+        async with semaphore:
+            return await llm.ainvoke(messages)
+    return RunnableLambda(call)
+
+
+def fake_llm(latency: float):
+    """Stand-in model that waits `latency` seconds, for measuring throughput without API calls."""
+    async def call(messages):
+        await asyncio.sleep(latency)
+        return AIMessage(content=f"(fake answer to: {messages.to_string()[-60:]!r})")
+    return RunnableLambda(call)
+
+
+def build_chain(llm):
+    """Same prompts as the notebook; returns the branch outputs along with the synthesis."""
+    summarize_prompt = ChatPromptTemplate.from_messages([
+        ("system", "Summarize the following topic concisely:"),
+        ("user", "{topic}")
+    ])
+    questions_prompt = ChatPromptTemplate.from_messages([
+        ("system", "Generate three interesting questions about the following topic:"),
+        ("user", "{topic}")
+    ])
+    terms_prompt = ChatPromptTemplate.from_messages([
+        ("system", "Identify 5-10 key terms from the following topic, separated by commas:"),
+        ("user", "{topic}")
+    ])
+    synthesis_prompt = ChatPromptTemplate.from_messages([
+        ("system", """Based on the following information about a topic:
+
+    Summary: {summary}
+
+    Related Questions: {questions}
+
+    Key Terms: {key_terms}
+
+    Synthesize a comprehensive answer that includes the summary, lists the related questions, and mentions the key terms."""),
+        ("user", "Original topic: {topic}")
+    ])
+
+    map_chain = RunnableParallel({
+        "topic": RunnablePassthrough(),
+        "summary": summarize_prompt | llm | StrOutputParser(),
+        "questions": questions_prompt | llm | StrOutputParser(),
+        "key_terms": terms_prompt | llm | StrOutputParser(),
+    })
+    return map_chain.assign(answer=synthesis_prompt | llm | StrOutputParser())
+
+
+def read_topics(path: str) -> list[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def completed_topics(path: str) -> set[str]:
+    """Topics already written to `path` without an error."""
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interrupted run
+            if "error" not in record:
+                done.add(record["topic"])
+    return done
+
+
+async def run_batch(chain, topics: list[str], output_path: str, concurrency: int) -> dict:
+    started = time.perf_counter()
+    succeeded = failed = 0
+    with open(output_path, "a", encoding="utf-8") as out:
+        # Topic-level concurrency only bounds how many chains are open at once;
+        # the shared semaphore inside the chain bounds the actual LLM calls
+        config = {"max_concurrency": concurrency}
+        async for index, result in chain.abatch_as_completed(topics, config=config, return_exceptions=True):
+            if isinstance(result, Exception):
+                record = {"topic": topics[index], "error": f"{type(result).__name__}: {result}"}
+                failed += 1
+            else:
+                record = result
+                succeeded += 1
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            done = succeeded + failed
+            if done % 100 == 0 or done == len(topics):
+                elapsed = time.perf_counter() - started
+                print(f"{done}/{len(topics)} topics, {done / elapsed:.1f} topics/s")
+    elapsed = time.perf_counter() - started
+    return {"succeeded": succeeded, "failed": failed, "seconds": elapsed, "topics_per_second": len(topics) / elapsed if topics else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("topics", help="text file with one topic per line")
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument("--concurrency", type=int, default=16, help="LLM calls in flight across all topics and branches")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--fake-latency", type=float, default=None, help="use a fake model with this latency (seconds)")
+    args = parser.parse_args()
+
+    topics = read_topics(args.topics)
+    done = completed_topics(args.output)
+    pending = list(dict.fromkeys(t for t in topics if t not in done))
+    print(f"{len(topics)} topics, {len(done)} already done, {len(pending)} to run")
+    if not pending:
+        return
+
+    async def run():
+        if args.fake_latency is not None:
+            model = fake_llm(args.fake_latency)
+        else:
+            from langchain_openai import ChatOpenAI
+            model = ChatOpenAI(model=args.model, temperature=0.7)
+        # The semaphore must be created inside the running event loop
+        chain = build_chain(limited(model, asyncio.Semaphore(args.concurrency)))
+        return await run_batch(chain, pending, args.output, args.concurrency)
+
+    report = asyncio.run(run())
+    print(f"Done: {report['succeeded']} succeeded, {report['failed']} failed in {report['seconds']:.1f}s "
+          f"({report['topics_per_second']:.2f} topics/s at concurrency {args.concurrency})")
+
+
+if __name__ == "__main__":
+    main()
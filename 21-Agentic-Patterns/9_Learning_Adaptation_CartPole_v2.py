@@ -0,0 +1,134 @@
+# 9 - Learning and Adaptation
+##  Reinforcement Learning with CartPole - v2: multi-process training and headless evaluation
+# - Same PPO agent as 9_Learning_Adaptation_CartPole.py, but training steps N copies of the environment
+#   in parallel worker processes (SubprocVecEnv), N defaulting to the number of CPU cores.
+# - Evaluation runs many episodes in parallel without a display and reports the mean reward.
+# - `--benchmark` trains with 1, 2, 4, ... environments and writes a steps/sec report,
+#   to show how training throughput scales with cores.
+#
+# Usage:
+#   python 9_Learning_Adaptation_CartPole_v2.py                      # train on all cores, evaluate headless
+#   python 9_Learning_Adaptation_CartPole_v2.py --n-envs 4 --render  # ... and watch one episode
+#   python 9_Learning_Adaptation_CartPole_v2.py --benchmark --timesteps 50000
+
+import argparse
+import json
+import os
+import time
+
+import gymnasium as gym
+from stable_baselines3 import PPO
+from stable_baselines3.common.env_util import make_vec_env
+from stable_baselines3.common.evaluation import evaluate_policy
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
+
+ENV_ID = "CartPole-v1"
+# PPO collects n_steps per environment per update; keep the rollout near the
+# single-env default of 2048 steps so results stay comparable across N
+ROLLOUT_STEPS = 2048
+BATCH_SIZE = 64
+
+
+def make_env(n_envs: int, seed: int = 0):
+    # One environment runs in-process; more are spread over worker processes
+    vec_env_cls = SubprocVecEnv if n_envs > 1 else DummyVecEnv
+    return make_vec_env(ENV_ID, n_envs=n_envs, seed=seed, vec_env_cls=vec_env_cls)
+
+
+def train(n_envs: int, timesteps: int, seed: int = 0, verbose: int = 0):
+    """Trains PPO on `n_envs` parallel environments; returns (model, steps per second)."""
+    env = make_env(n_envs, seed)
+    n_steps = max(BATCH_SIZE, ROLLOUT_STEPS // n_envs // BATCH_SIZE * BATCH_SIZE)
+    model = PPO("MlpPolicy", env, n_steps=n_steps, batch_size=BATCH_SIZE, seed=seed, verbose=verbose)
+    started = time.perf_counter()
+    model.learn(total_timesteps=timesteps)
+    elapsed = time.perf_counter() - started
+    env.close()
+    return model, model.num_timesteps / elapsed
+
+
+def evaluate(model, n_episodes: int = 100, n_envs: int = None, seed: int = 1000):
+    """Headless evaluation: `n_episodes` deterministic episodes spread over parallel environments."""
+    n_envs = n_envs or min(n_episodes, os.cpu_count() or 1)
+    env = make_env(n_envs, seed)
+    mean_reward, std_reward = evaluate_policy(model, env, n_eval_episodes=n_episodes, deterministic=True)
+    env.close()
+    return mean_reward, std_reward
+
+
+def watch(model):
+    # Optional visual check, as in v1 (needs a display)
+    eval_env = gym.make(ENV_ID, render_mode="human")
+    obs, info = eval_env.reset()
+    for i in range(1000):
+        action, _states = model.predict(obs, deterministic=True)
+        obs, rewards, terminated, truncated, info = eval_env.step(action)
+        if terminated or truncated:
+            print(f"Episode finished after {i+1} timesteps.")
+            break
+    eval_env.close()
+
+
+def benchmark(timesteps: int, eval_episodes: int, max_envs: int, report_path: str):
+    counts = []
+    n = 1
+    while n < max_envs:
+        counts.append(n)
+        n *= 2
+    counts.append(max_envs)
+
+    results = []
+    print(f"{'n_envs':>6} {'steps/s':>10} {'speedup':>8} {'train s':>8} {'mean reward':>12}")
+    for n_envs in counts:
+        started = time.perf_counter()
+        model, steps_per_second = train(n_envs, timesteps)
+        train_seconds = time.perf_counter() - started
+        mean_reward, std_reward = evaluate(model, eval_episodes)
+        results.append({
+            "n_envs": n_envs,
+            "steps_per_second": steps_per_second,
+            "train_seconds": train_seconds,
+            "mean_reward": mean_reward,
+            "std_reward": std_reward,
+        })
+        speedup = steps_per_second / results[0]["steps_per_second"]
+        print(f"{n_envs:>6} {steps_per_second:>10.0f} {speedup:>7.2f}x {train_seconds:>8.1f} {mean_reward:>12.1f}")
+
+    report = {"env": ENV_ID, "timesteps": timesteps, "eval_episodes": eval_episodes, "cpu_count": os.cpu_count(), "results": results}
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nBenchmark report written to {report_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-process PPO training and headless evaluation on CartPole-v1")
+    parser.add_argument("--n-envs", type=int, default=os.cpu_count() or 1, help="parallel environments (default: CPU count)")
+    parser.add_argument("--timesteps", type=int, default=10000)
+    parser.add_argument("--eval-episodes", type=int, default=100)
+    parser.add_argument("--render", action="store_true", help="watch one episode after training (needs a display)")
+    parser.add_argument("--benchmark", action="store_true", help="measure steps/sec for 1, 2, 4, ... --n-envs environments")
+    parser.add_argument("--report", default="cartpole_benchmark.json")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.timesteps, args.eval_episodes, args.n_envs, args.report)
+        return
+
+    # 1-3. Build N environments, choose PPO and train
+    print(f"Training the agent on {args.n_envs} parallel environments...")
+    model, steps_per_second = train(args.n_envs, args.timesteps, verbose=1)
+    print(f"Training complete! ({steps_per_second:.0f} steps/s)")
+
+    # 4. Evaluate the trained agent, headless and in parallel
+    print(f"\nEvaluating the trained agent on {args.eval_episodes} episodes...")
+    mean_reward, std_reward = evaluate(model, args.eval_episodes)
+    print(f"Mean reward: {mean_reward:.1f} +/- {std_reward:.1f}")
+
+    if args.render:
+        watch(model)
+    print("Evaluation complete.")
+
+
+# The guard is required: SubprocVecEnv workers re-import this module on spawn-based platforms
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Persistent ADK memory service backed by SQLite FTS5, with an optional embedding column.
+
+Drop-in replacement for InMemoryMemoryService (same add_session_to_memory / search_memory
+contract, so `load_memory` works unchanged) that survives restarts and does not scan every
+stored event on each search:
+
+- Events are indexed incrementally. Each session remembers how many of its events are already
+  indexed, so adding a session again only indexes the new turns.
+- Keyword search is a single FTS5 query ranked by BM25. The (app_name, user_id) scope is an
+  indexed token in the same FTS row, so the index intersects posting lists instead of
+  filtering the matches of every user.
+- With `embeddings` (any LangChain Embeddings), event vectors are stored next to the text and
+  semantic matches are fused with the keyword matches by reciprocal rank.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import unicodedata
+from datetime import datetime
+
+import numpy as np
+from google.adk.memory import BaseMemoryService
+from google.adk.memory.base_memory_service import SearchMemoryResponse
+from google.adk.memory.memory_entry import MemoryEntry
+from google.genai import types
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory_events (
+    id INTEGER PRIMARY KEY,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    author TEXT,
+    timestamp REAL,
+    content TEXT NOT NULL,
+    vector BLOB,
+    UNIQUE (app_name, user_id, session_id, event_id)
+);
+CREATE INDEX IF NOT EXISTS memory_events_scope ON memory_events (app_name, user_id);
+CREATE TABLE IF NOT EXISTS memory_sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    indexed_events INTEGER NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS memory_fts USING fts5(scope, text, tokenize = 'unicode61');
+"""
+
+RRF_K = 60
+# Memories returned per search unless the caller sets `max_results`
+DEFAULT_MAX_RESULTS = 20
+
+
+def scope_token(app_name: str, user_id: str) -> str:
+    """A single FTS token identifying the (app_name, user_id) memory scope."""
+    return "s" + hashlib.sha1(f"{app_name}\0{user_id}".encode("utf-8")).hexdigest()
+
+
+def event_text(event) -> str:
+    if not event.content or not event.content.parts:
+        return ""
+    return " ".join(part.text for part in event.content.parts if part.text)
+
+
+def fts_query(query: str) -> str:
+    """Any query word may match, like InMemoryMemoryService; BM25 ranks events matching more words first."""
+    words = {w.lower() for w in re.findall(r"\w+", unicodedata.normalize("NFC", query))}
+    return " OR ".join(f'"{w}"' for w in sorted(words))
+
+
+class SqliteMemoryService(BaseMemoryService):
+    """
+    Memory service stored in a single SQLite file (WAL mode, safe to share between processes).
+    Unlike InMemoryMemoryService, which returns every event matching a query word, a search
+    returns at most `max_results` memories, best first, so it stays fast on large stores;
+    `max_results=None` returns every keyword match (plus up to DEFAULT_MAX_RESULTS semantic ones).
+    """
+
+    def __init__(self, db_path: str = "adk_memory.sqlite", embeddings=None, max_results: int = DEFAULT_MAX_RESULTS):
+        self.db_path = db_path
+        self.embeddings = embeddings
+        self.max_results = max_results
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        # scope -> (max id, ids, matrix); refreshed from the database when other
+        # processes (or this one) have added vectors since it was loaded
+        self._vectors = {}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # --- Indexing ---
+    def _index_events(self, app_name: str, user_id: str, session_id: str, events) -> int:
+        rows = [(event, text) for event in events if (text := event_text(event))]
+        vectors = [None] * len(rows)
+        if self.embeddings is not None and rows:
+            embedded = np.asarray(self.embeddings.embed_documents([text for _, text in rows]), dtype=np.float32)
+            norms = np.linalg.norm(embedded, axis=1, keepdims=True)
+            vectors = [v.tobytes() for v in embedded / np.where(norms == 0, 1, norms)]
+
+        scope = scope_token(app_name, user_id)
+        added = 0
+        with self._lock, self._conn:
+            for (event, text), vector in zip(rows, vectors):
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO memory_events "
+                    "(app_name, user_id, session_id, event_id, author, timestamp, content, vector) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (app_name, user_id, session_id, event.id, event.author, event.timestamp,
+                     event.content.model_dump_json(exclude_none=True), vector),
+                )
+                if cursor.rowcount:
+                    self._conn.execute("INSERT INTO memory_fts (rowid, scope, text) VALUES (?, ?, ?)", (cursor.lastrowid, scope, text))
+                    added += 1
+        return added
+
+    def _add_session(self, session) -> int:
+        key = (session.app_name, session.user_id, session.id)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT indexed_events FROM memory_sessions WHERE app_name = ? AND user_id = ? AND session_id = ?", key
+            ).fetchone()
+        indexed = row[0] if row else 0
+        # A session that shrank (rewound or recreated) is rescanned; duplicates are ignored by event id
+        new_events = session.events[indexed:] if indexed <= len(session.events) else session.events
+        added = self._index_events(*key, new_events)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO memory_sessions (app_name, user_id, session_id, indexed_events) VALUES (?, ?, ?, ?)",
+                (*key, len(session.events)),
+            )
+        return added
+
+    async def add_session_to_memory(self, session) -> None:
+        await asyncio.to_thread(self._add_session, session)
+
+    async def add_events_to_memory(self, *, app_name: str, user_id: str, events, session_id: str = None, custom_metadata=None) -> None:
+        await asyncio.to_thread(self._index_events, app_name, user_id, session_id or "__unknown_session_id__", events)
+
+    # --- Search ---
+    def _keyword_ids(self, scope: str, query: str, limit: int = None) -> list[int]:
+        terms = fts_query(query)
+        if not terms:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rowid FROM memory_fts WHERE memory_fts MATCH ? ORDER BY bm25(memory_fts) LIMIT ?",
+                (f'scope : "{scope}" AND text : ({terms})', -1 if limit is None else limit),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _vector_ids(self, app_name: str, user_id: str, query: str, limit: int) -> list[int]:
+        scope = scope_token(app_name, user_id)
+        with self._lock:
+            # Events are only ever inserted, so the highest row id is the scope's version;
+            # rows added since the cached copy (by any process) are appended to it
+            max_id, ids, matrix = self._vectors.get(scope, (0, np.zeros(0, dtype=np.int64), None))
+            rows = self._conn.execute(
+                "SELECT id, vector FROM memory_events WHERE app_name = ? AND user_id = ? AND id > ? AND vector IS NOT NULL ORDER BY id",
+                (app_name, user_id, max_id),
+            ).fetchall()
+            if rows:
+                new = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32).reshape(len(rows), -1)
+                ids = np.concatenate([ids, np.array([row[0] for row in rows], dtype=np.int64)])
+                matrix = new if matrix is None else np.vstack([matrix, new])
+                self._vectors[scope] = (rows[-1][0], ids, matrix)
+        if matrix is None:
+            return []
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        scores = matrix @ (vector / (np.linalg.norm(vector) or 1))
+        k = min(limit, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return ids[top[np.argsort(-scores[top])]].tolist()
+
+    def _search(self, app_name: str, user_id: str, query: str) -> list[MemoryEntry]:
+        limit = None if self.max_results is None else self.max_results * 2
+        ranked = [self._keyword_ids(scope_token(app_name, user_id), query, limit)]
+        if self.embeddings is not None:
+            ranked.append(self._vector_ids(app_name, user_id, query, limit or DEFAULT_MAX_RESULTS))
+        fused = {}
+        for ids in ranked:
+            for rank, row_id in enumerate(ids):
+                fused[row_id] = fused.get(row_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+        top = sorted(fused, key=fused.get, reverse=True)[: self.max_results]
+        if not top:
+            return []
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, session_id, event_id, author, timestamp, content FROM memory_events WHERE id IN ({','.join('?' * len(top))})",
+                top,
+            ).fetchall()
+        by_id = {row[0]: row for row in rows}
+        return [
+            MemoryEntry(
+                content=types.Content.model_validate_json(content),
+                id=event_id,
+                author=author,
+                timestamp=datetime.fromtimestamp(timestamp).isoformat() if timestamp is not None else None,
+                custom_metadata={"session_id": session_id},
+            )
+            for _, session_id, event_id, author, timestamp, content in (by_id[i] for i in top if i in by_id)
+        ]
+
+    async def search_memory(self, *, app_name: str, user_id: str, query: str) -> SearchMemoryResponse:
+        memories = await asyncio.to_thread(self._search, app_name, user_id, query)
+        return SearchMemoryResponse(memories=memories)
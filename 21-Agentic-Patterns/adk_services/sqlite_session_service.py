@@ -0,0 +1,428 @@
+"""
+Durable ADK session service backed by SQLite, with write batching and an LRU of hot sessions.
+
+Drop-in replacement for InMemorySessionService in the Runner examples:
+
+- Sessions, events and state survive restarts and can be shared by several runner processes
+  (WAL mode, so readers never block the writer).
+- `append_event` updates the session in memory and queues the write. Queued events and state
+  deltas are committed in one transaction when `batch_size` writes are pending, every
+  `flush_interval` seconds from a background thread, on `flush()` / `close()`, and before any
+  read that has to go to the database.
+- State is stored one row per key. A state delta upserts only the keys it changes instead of
+  copying and rewriting the whole state dict.
+- Up to `max_cached_sessions` recently used sessions stay in memory. Reads and appends reuse a
+  cached session only while the database still holds the `last_update_time` it was synced
+  with, so sessions another process wrote to are reloaded. Each flush re-checks this inside
+  its write transaction. Appending to a session object older than the stored session raises
+  ValueError, as DatabaseSessionService does. Appends from two processes that race within one
+  flush window are both kept: events are interleaved and the last flushed state delta wins.
+- If the database is busy, a flush keeps its writes queued and the background thread retries.
+  Any other failure drops the failing session's writes and raises.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Optional
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session, State
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    last_update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id)
+);
+CREATE TABLE IF NOT EXISTS session_state (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id, key)
+);
+CREATE TABLE IF NOT EXISTS user_state (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, key)
+);
+CREATE TABLE IF NOT EXISTS app_state (
+    app_name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (app_name, key)
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_session ON events (app_name, user_id, session_id, seq);
+"""
+
+STALE_SESSION_MESSAGE = (
+    "The session has been modified in storage since it was loaded. "
+    "Please reload the session before appending more events."
+)
+
+logger = logging.getLogger(__name__)
+
+
+def is_busy(error: Exception) -> bool:
+    """Whether `error` is SQLite's transient "database is locked" (busy or locked) error."""
+    return isinstance(error, sqlite3.OperationalError) and "locked" in str(error)
+
+
+def split_state(state: dict) -> tuple[dict, dict, dict]:
+    """Splits a state dict or delta into (app, user, session) parts; temp: keys are never stored."""
+    app, user, session = {}, {}, {}
+    for key, value in (state or {}).items():
+        if key.startswith(State.APP_PREFIX):
+            app[key[len(State.APP_PREFIX):]] = value
+        elif key.startswith(State.USER_PREFIX):
+            user[key[len(State.USER_PREFIX):]] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session[key] = value
+    return app, user, session
+
+
+def copy_session(session: Session, events=None) -> Session:
+    """Copies the containers (events, state) but not the events themselves."""
+    copied = session.model_copy(deep=False)
+    copied.events = list(session.events if events is None else events)
+    copied.state = copy.copy(session.state)
+    return copied
+
+
+class SqliteSessionService(BaseSessionService):
+    """Session service stored in one SQLite file; see the module docstring for the write path."""
+
+    def __init__(
+        self,
+        db_path: str = "adk_sessions.sqlite",
+        batch_size: int = 64,
+        flush_interval: float = 0.05,
+        max_cached_sessions: int = 256,
+    ):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_cached_sessions = max_cached_sessions
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._cache = OrderedDict()  # (app, user, session) -> storage Session (session-scoped state only)
+        self._pending = []  # queued (session key, sql, params) writes, committed together
+        self._synced = {}  # session -> database last_update_time its cached copy matches
+        self._closed = threading.Event()
+        self._flusher = None
+        if flush_interval:
+            self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+            self._flusher.start()
+
+    # --- Write batching ---
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self._flush()
+            except Exception:
+                logger.exception("Flushing session writes failed")
+
+    def _flush(self):
+        """
+        Commits the queued writes in one transaction. If the database is busy they stay queued;
+        on any other error the failing session's writes are dropped, the rest stay queued for the
+        next flush, and the error is raised.
+        """
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            dirty = {key for key, _, _ in pending}
+            failed_key = None
+            try:
+                with self._conn:
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    # Another process appended since our copy was loaded: drop it so it is reloaded
+                    for key in dirty:
+                        row = self._conn.execute(
+                            "SELECT last_update_time FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?", key
+                        ).fetchone()
+                        if (row[0] if row else None) != self._synced.get(key):
+                            self._cache.pop(key, None)
+                    for key, sql, params in pending:
+                        failed_key = key
+                        self._conn.execute(sql, params)
+                    failed_key = None
+                    for key in dirty:
+                        row = self._conn.execute(
+                            "SELECT last_update_time FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?", key
+                        ).fetchone()
+                        self._synced[key] = row[0] if row else None
+            except Exception as e:
+                if is_busy(e):
+                    self._pending[:0] = pending
+                else:
+                    # Never retry a write that cannot succeed: it would block every later write
+                    self._pending[:0] = [write for write in pending if failed_key is not None and write[0] != failed_key]
+                    for key in dirty if failed_key is None else [failed_key]:
+                        self._cache.pop(key, None)  # now ahead of the database
+                        self._synced.pop(key, None)
+                raise
+
+    def _queue(self, key, writes):
+        with self._lock:
+            self._pending.extend((key, sql, params) for sql, params in writes)
+            if len(self._pending) >= self.batch_size:
+                try:
+                    self._flush()
+                except sqlite3.OperationalError as e:
+                    if not is_busy(e):
+                        raise
+                    logger.warning("Database busy, %d session writes stay queued", len(self._pending))
+
+    async def flush(self) -> None:
+        await asyncio.to_thread(self._flush)
+
+    def close(self):
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self._flush()
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _state_writes(app_name: str, user_id: str, session_id: str, state: dict) -> list:
+        app, user, session = split_state(state)
+        writes = [("INSERT OR REPLACE INTO app_state VALUES (?, ?, ?)", (app_name, k, json.dumps(v))) for k, v in app.items()]
+        writes += [("INSERT OR REPLACE INTO user_state VALUES (?, ?, ?, ?)", (app_name, user_id, k, json.dumps(v))) for k, v in user.items()]
+        writes += [
+            ("INSERT OR REPLACE INTO session_state VALUES (?, ?, ?, ?, ?)", (app_name, user_id, session_id, k, json.dumps(v)))
+            for k, v in session.items()
+        ]
+        return writes
+
+    # --- Reads ---
+    def _scoped_state(self, app_name: str, user_id: str) -> dict:
+        state = {}
+        for key, value in self._conn.execute("SELECT key, value FROM app_state WHERE app_name = ?", (app_name,)):
+            state[State.APP_PREFIX + key] = json.loads(value)
+        for key, value in self._conn.execute("SELECT key, value FROM user_state WHERE app_name = ? AND user_id = ?", (app_name, user_id)):
+            state[State.USER_PREFIX + key] = json.loads(value)
+        return state
+
+    def _cache_put(self, key, session: Session):
+        self._cache[key] = session
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_cached_sessions:
+            evicted, _ = self._cache.popitem(last=False)
+            self._synced.pop(evicted, None)
+
+    def _storage_session(self, app_name: str, user_id: str, session_id: str) -> Optional[Session]:
+        """The cached session if it is still current, otherwise loaded from the database."""
+        key = (app_name, user_id, session_id)
+        self._flush()
+        row = self._conn.execute(
+            "SELECT last_update_time FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?", key
+        ).fetchone()
+        if row is None:
+            self._cache.pop(key, None)
+            self._synced.pop(key, None)
+            return None
+        cached = self._cache.get(key)
+        if cached is not None and self._synced.get(key) == row[0]:
+            self._cache.move_to_end(key)
+            return cached
+
+        state = {
+            k: json.loads(v)
+            for k, v in self._conn.execute(
+                "SELECT key, value FROM session_state WHERE app_name = ? AND user_id = ? AND session_id = ?", key
+            )
+        }
+        events = [
+            Event.model_validate_json(data)
+            for (data,) in self._conn.execute(
+                "SELECT data FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? ORDER BY seq", key
+            )
+        ]
+        session = Session(app_name=app_name, user_id=user_id, id=session_id, state=state, events=events, last_update_time=row[0])
+        self._cache_put(key, session)
+        self._synced[key] = row[0]
+        return session
+
+    # --- BaseSessionService ---
+    def _create_session(self, app_name: str, user_id: str, state: Optional[dict], session_id: Optional[str]) -> Session:
+        session_id = session_id.strip() if session_id else str(uuid.uuid4())
+        with self._lock:
+            if self._storage_session(app_name, user_id, session_id) is not None:
+                raise ValueError(f"Session with id {session_id} already exists.")
+            now = time.time()
+            session = Session(app_name=app_name, user_id=user_id, id=session_id, state=split_state(state)[2], last_update_time=now)
+            key = (app_name, user_id, session_id)
+            writes = [("INSERT INTO sessions VALUES (?, ?, ?, ?)", (*key, now))]
+            self._synced[key] = None  # no row yet; the flush records the one it inserts
+            self._cache_put(key, session)
+            try:
+                self._queue(key, writes + self._state_writes(*key, state))
+                self._flush()
+            except sqlite3.IntegrityError:
+                # Another process created it after our check
+                raise ValueError(f"Session with id {session_id} already exists.") from None
+            copied = copy_session(session)
+            copied.state.update(self._scoped_state(app_name, user_id))
+            return copied
+
+    async def create_session(
+        self, *, app_name: str, user_id: str, state: Optional[dict[str, Any]] = None, session_id: Optional[str] = None
+    ) -> Session:
+        return await asyncio.to_thread(self._create_session, app_name, user_id, state, session_id)
+
+    def _get_session(self, app_name: str, user_id: str, session_id: str, config: Optional[GetSessionConfig]) -> Optional[Session]:
+        with self._lock:
+            session = self._storage_session(app_name, user_id, session_id)
+            if session is None:
+                return None
+            events = session.events
+            if config and config.num_recent_events is not None:
+                events = events[-config.num_recent_events:] if config.num_recent_events else []
+            if config and config.after_timestamp is not None:
+                events = [e for e in events if e.timestamp >= config.after_timestamp]
+            copied = copy_session(session, events)
+            copied.state.update(self._scoped_state(app_name, user_id))
+            return copied
+
+    async def get_session(
+        self, *, app_name: str, user_id: str, session_id: str, config: Optional[GetSessionConfig] = None
+    ) -> Optional[Session]:
+        return await asyncio.to_thread(self._get_session, app_name, user_id, session_id, config)
+
+    def _list_sessions(self, app_name: str, user_id: Optional[str]) -> ListSessionsResponse:
+        with self._lock:
+            self._flush()
+            query = "SELECT user_id, session_id, last_update_time FROM sessions WHERE app_name = ?"
+            params = [app_name]
+            if user_id is not None:
+                query += " AND user_id = ?"
+                params.append(user_id)
+            rows = self._conn.execute(query + " ORDER BY last_update_time, user_id, session_id", params).fetchall()
+            states = {}
+            for uid, sid, key, value in self._conn.execute(
+                "SELECT user_id, session_id, key, value FROM session_state WHERE app_name = ?" + (" AND user_id = ?" if user_id is not None else ""),
+                params,
+            ):
+                states.setdefault((uid, sid), {})[key] = json.loads(value)
+            scoped = {uid: self._scoped_state(app_name, uid) for uid in {row[0] for row in rows}}
+            sessions = [
+                Session(
+                    app_name=app_name, user_id=uid, id=sid, last_update_time=updated,
+                    state={**states.get((uid, sid), {}), **scoped[uid]},
+                )
+                for uid, sid, updated in rows
+            ]
+            return ListSessionsResponse(sessions=sessions)
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        return await asyncio.to_thread(self._list_sessions, app_name, user_id)
+
+    def _delete_session(self, app_name: str, user_id: str, session_id: str):
+        key = (app_name, user_id, session_id)
+        with self._lock:
+            self._flush()
+            with self._conn:
+                for table in ("events", "session_state", "sessions"):
+                    self._conn.execute(f"DELETE FROM {table} WHERE app_name = ? AND user_id = ? AND session_id = ?", key)
+            self._cache.pop(key, None)
+            self._synced.pop(key, None)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await asyncio.to_thread(self._delete_session, app_name, user_id, session_id)
+
+    async def get_user_state(self, *, app_name: str, user_id: str) -> dict[str, Any]:
+        def read():
+            with self._lock:
+                self._flush()
+                return {
+                    key: json.loads(value)
+                    for key, value in self._conn.execute(
+                        "SELECT key, value FROM user_state WHERE app_name = ? AND user_id = ?", (app_name, user_id)
+                    )
+                }
+        return await asyncio.to_thread(read)
+
+    def _append_target(self, session: Session) -> Session:
+        """The storage session to append to, reloaded if another process wrote to it since."""
+        key = (session.app_name, session.user_id, session.id)
+        with self._lock:
+            storage = self._cache.get(key)
+            if storage is not None:
+                # Our own queued writes are not in the database yet, so compare with the synced time
+                row = self._conn.execute(
+                    "SELECT last_update_time FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?", key
+                ).fetchone()
+                if row is not None and row[0] == self._synced.get(key):
+                    self._cache.move_to_end(key)
+                else:
+                    storage = None
+            if storage is None:
+                storage = self._storage_session(*key)
+        if storage is None:
+            raise ValueError(f"Session {session.id} not found.")
+        if session.last_update_time < storage.last_update_time:
+            raise ValueError(STALE_SESSION_MESSAGE)
+        return storage
+
+    def _store_event(self, session: Session, storage: Session, event: Event):
+        key = (session.app_name, session.user_id, session.id)
+        with self._lock:
+            if storage is not session:
+                storage.events.append(event)
+            storage.last_update_time = event.timestamp
+
+            delta = event.actions.state_delta if event.actions and event.actions.state_delta else {}
+            storage.state.update(split_state(delta)[2])
+            self._queue(
+                key,
+                [
+                    ("INSERT INTO events (app_name, user_id, session_id, event_id, timestamp, data) VALUES (?, ?, ?, ?, ?, ?)",
+                     (*key, event.id, event.timestamp, event.model_dump_json(exclude_none=True))),
+                    # MAX: a batch flushed after another process's newer write must not move the time back
+                    ("UPDATE sessions SET last_update_time = MAX(last_update_time, ?) WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                     (event.timestamp, *key)),
+                ]
+                + self._state_writes(*key, delta),
+            )
+            self._cache_put(key, storage)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        storage = await asyncio.to_thread(self._append_target, session)
+
+        # Updates the caller's session object (state delta + events) like InMemorySessionService
+        event = await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+        await asyncio.to_thread(self._store_event, session, storage, event)
+        return event
@@ -0,0 +1,61 @@
+# Rendering helpers shared by carrace_v1.py and carrace_v2.py:
+# - DirtyRectRenderer keeps the static road (background + lane lines) in a pre-rendered surface,
+#   erases only what was drawn last frame and pushes only changed rectangles to the display.
+# - cached_text keeps rendered text surfaces until the text (e.g. time or lives) changes.
+
+import functools
+import statistics
+
+import pygame
+
+
+@functools.lru_cache(maxsize=512)
+def cached_text(font, text, color):
+    return font.render(text, True, color)
+
+
+class DirtyRectRenderer:
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background
+        self.full_redraw = False  # set to True to redraw and flip the whole screen every frame
+        self._bounds = screen.get_rect()
+        self._previous = []
+        self._current = []
+        self._invalid = True
+
+    def invalidate(self):
+        """Forces a full redraw next frame, e.g. after something else drew over the screen."""
+        self._invalid = True
+
+    def begin_frame(self):
+        if self._invalid or self.full_redraw:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            # Restore the road under everything drawn last frame
+            for rect in self._previous:
+                self.screen.blit(self.background, rect, rect)
+
+    def blit(self, surface, position):
+        self.mark(self.screen.blit(surface, position))
+
+    def mark(self, rect):
+        rect = rect.clip(self._bounds)
+        if rect.width and rect.height:
+            self._current.append(rect)
+
+    def end_frame(self):
+        if self._invalid or self.full_redraw:
+            pygame.display.flip()
+            self._invalid = False
+        else:
+            # Old positions need erasing on the display as much as new ones need drawing
+            pygame.display.update(self._previous + self._current)
+        self._previous, self._current = self._current, []
+
+
+def report_frame_times(label, frame_ms, fps):
+    frame_ms = sorted(frame_ms)
+    print(f"{label}: {len(frame_ms)} frames, mean {statistics.mean(frame_ms):.2f} ms, "
+          f"p95 {frame_ms[int(len(frame_ms) * 0.95) - 1]:.2f} ms, max {frame_ms[-1]:.2f} ms "
+          f"(budget at {fps} FPS: {1000 / fps:.1f} ms)")
@@ -0,0 +1,264 @@
+# Headless simulation core for carrace_v2.py: enemy movement, spawning, collisions, timer and lives.
+# - Pure Python, no pygame: the game draws a RaceSim, tests and agents can just step it.
+# - Fixed timestep: one step() is one 1/FPS-second tick, so a race plays out the same however
+#   fast it is stepped, and the timer counts ticks instead of wall-clock milliseconds.
+# - Deterministic: all randomness comes from a random.Random seeded in the constructor.
+#
+# Usage:
+#   python carrace_sim.py --benchmark                     # ticks/sec with a random driver
+#   python carrace_sim.py --benchmark --ticks 200000 --seed 3
+
+import argparse
+import bisect
+import random
+import time
+
+WIDTH, HEIGHT = 800, 600
+LANES = 4
+LANE_WIDTH = WIDTH // LANES
+CAR_WIDTH, CAR_HEIGHT = 50, 100
+FPS = 60
+GAME_TIME = 60
+LIVES = 3
+# A lane counts as occupied for spawning while its topmost car is less than this far below
+# the spawn point; the default covers the whole road, i.e. one car per lane at a time
+SPAWN_GAP = HEIGHT + CAR_HEIGHT
+SPAWN_ODDS = 40  # a spawn is attempted on average once every SPAWN_ODDS ticks
+BILLBOARD_WIDTH = 16
+BILLBOARD_HEIGHT = 80
+
+
+class Car:
+    __slots__ = ("x", "y", "speed", "lane", "number")
+
+    def __init__(self, x, y, speed=0, lane=None, number=None):
+        self.x = x
+        self.y = y
+        self.speed = speed
+        self.lane = lane
+        self.number = number
+
+    def collides(self, other):
+        return (self.x < other.x + CAR_WIDTH and other.x < self.x + CAR_WIDTH
+                and self.y < other.y + CAR_HEIGHT and other.y < self.y + CAR_HEIGHT)
+
+
+def _car_y(car):
+    return car.y
+
+
+class LaneIndex:
+    """
+    Enemy cars kept per lane, each lane sorted by y (topmost car first).
+    Cars only collide with their neighbours in the same lane, so collision and
+    occupancy checks look at adjacent cars instead of every pair.
+    """
+
+    def __init__(self, lanes=LANES):
+        self.lanes = [[] for _ in range(lanes)]
+
+    def __iter__(self):
+        for lane in self.lanes:
+            yield from lane
+
+    def __len__(self):
+        return sum(len(lane) for lane in self.lanes)
+
+    def clear(self):
+        for lane in self.lanes:
+            lane.clear()
+
+    def add(self, car):
+        bisect.insort(self.lanes[car.lane], car, key=_car_y)
+
+    def spawn_clear(self, lane, gap=SPAWN_GAP):
+        cars = self.lanes[lane]
+        return not cars or cars[0].y >= -CAR_HEIGHT + gap
+
+    def near(self, x, y, width=CAR_WIDTH, height=CAR_HEIGHT):
+        """Cars that may overlap the box at (x, y): lanes under its x range, y within one car length."""
+        first = max(0, x // LANE_WIDTH)
+        last = min(len(self.lanes) - 1, (x + width - 1) // LANE_WIDTH)
+        for lane in self.lanes[first:last + 1]:
+            start = bisect.bisect_right(lane, y - CAR_HEIGHT, key=_car_y)
+            for car in lane[start:]:
+                if car.y >= y + height:
+                    break
+                yield car
+
+    def visible(self):
+        """Cars intersecting the screen, for drawing."""
+        return self.near(0, 0, WIDTH, HEIGHT)
+
+    def move(self):
+        for lane in self.lanes:
+            # Move cars and remove if out of bounds (the bottom of the sorted lane)
+            for car in lane:
+                car.y += car.speed
+            while lane and lane[-1].y > HEIGHT:
+                lane.pop()
+            # Cars in a lane collide before they can pass each other, so the order only
+            # changes in rare cases; re-sorting a nearly sorted list is linear
+            lane.sort(key=_car_y)
+            # Enemy-enemy collisions between neighbours remove both cars
+            kept = []
+            i = 0
+            while i < len(lane):
+                if i + 1 < len(lane) and lane[i].collides(lane[i + 1]):
+                    i += 2
+                    continue
+                kept.append(lane[i])
+                i += 1
+            lane[:] = kept
+
+
+def initial_billboards():
+    # [x, y] pairs along the leftmost edge of the left track and the rightmost edge of the right track
+    left = [0, HEIGHT // 3, 2 * HEIGHT // 3, HEIGHT // 2, HEIGHT // 5, HEIGHT // 5 * 4]
+    right = [HEIGHT // 6, HEIGHT // 2, HEIGHT // 3, HEIGHT // 5 * 3, HEIGHT // 5, HEIGHT // 5 * 4]
+    return [[0, y] for y in left] + [[WIDTH - BILLBOARD_WIDTH, y] for y in right]
+
+
+class RaceSim:
+    """
+    One race. Call step(left, right, accelerate) once per tick; it returns the events of
+    that tick ("crash", "game_over"). `time_remaining` and `lives` are what the scoreboard shows.
+    """
+
+    def __init__(self, seed=None, game_time=GAME_TIME, lives=LIVES, tick_rate=FPS,
+                 spawn_odds=SPAWN_ODDS, spawn_gap=SPAWN_GAP):
+        self.rng = random.Random(seed)
+        self.tick_rate = tick_rate
+        self.dt = 1 / tick_rate
+        self.game_time = game_time
+        self.spawn_odds = spawn_odds  # 0 disables spawning
+        self.spawn_gap = spawn_gap
+        self.ticks = 0
+        self.lives = lives
+        self.car_speed = 5
+        self.player = Car(0, 0)
+        self.reset_player()
+        self.enemies = LaneIndex()
+        self.billboards = initial_billboards()
+
+    @property
+    def time_remaining(self):
+        return self.game_time - self.ticks // self.tick_rate
+
+    @property
+    def done(self):
+        return self.time_remaining <= 0 or self.lives <= 0
+
+    def reset_player(self):
+        self.player.x = WIDTH // 2 - CAR_WIDTH // 2
+        self.player.y = HEIGHT - CAR_HEIGHT - 10
+
+    def step(self, left=False, right=False, accelerate=False):
+        events = []
+        if left and self.player.x > 0:
+            self.player.x -= 5
+        if right and self.player.x < WIDTH - CAR_WIDTH:
+            self.player.x += 5
+        # Accelerate if UP is pressed, else slow down
+        if accelerate:
+            self.car_speed = min(self.car_speed + 0.2, 18)
+        else:
+            self.car_speed = max(self.car_speed - 0.15, 5)
+
+        self.move_billboards()
+        self.spawn_enemy()
+        self.enemies.move()
+
+        if self.check_collision():
+            events.append("crash")
+            self.lives -= 1
+            if self.lives > 0:
+                self.reset_player()
+                self.enemies.clear()
+                self.car_speed = 5
+
+        self.ticks += 1
+        if self.done:
+            events.append("game_over")
+        return events
+
+    def move_billboards(self):
+        for bb in self.billboards:
+            bb[1] += self.car_speed
+            if bb[1] > HEIGHT:
+                bb[1] = -BILLBOARD_HEIGHT
+
+    def spawn_enemy(self):
+        if not self.spawn_odds or self.rng.randrange(self.spawn_odds) != 0:
+            return
+        lane = self.rng.randrange(len(self.enemies.lanes))
+        # Only spawn if no car is in this lane (near the spawn point)
+        if not self.enemies.spawn_clear(lane, self.spawn_gap):
+            return
+        car = Car(lane * LANE_WIDTH + (LANE_WIDTH - CAR_WIDTH) // 2, -CAR_HEIGHT,
+                  speed=self.rng.randint(4, 10), lane=lane, number=len(self.enemies) + 1)
+        # Prevent overlap at spawn (shouldn't happen due to lane check, but extra safety)
+        if not any(car.collides(c) for c in self.enemies.near(car.x, car.y)):
+            self.enemies.add(car)
+
+    def check_collision(self):
+        return any(self.player.collides(car) for car in self.enemies.near(self.player.x, self.player.y))
+
+    def snapshot(self):
+        """Hashable state, for checking that two runs with the same seed and inputs agree."""
+        return (self.ticks, self.lives, round(self.car_speed, 6), self.player.x, self.player.y,
+                tuple((c.lane, c.y, c.speed, c.number) for c in self.enemies))
+
+
+def random_driver(seed=None):
+    """Inputs for benchmarks: holds a random (left, right, accelerate) choice for 10-40 ticks."""
+    rng = random.Random(seed)
+    while True:
+        controls = (rng.random() < 0.3, rng.random() < 0.3, rng.random() < 0.5)
+        for _ in range(rng.randint(10, 40)):
+            yield controls
+
+
+def run(ticks, seed=0):
+    """Steps races with a random driver for `ticks` ticks (starting a new race when one ends)."""
+    sim = RaceSim(seed=seed)
+    driver = random_driver(seed)
+    races = crashes = 0
+    for _ in range(ticks):
+        if "crash" in sim.step(*next(driver)):
+            crashes += 1
+        if sim.done:
+            races += 1
+            sim = RaceSim(seed=sim.rng.random())
+    return sim, races, crashes
+
+
+def benchmark(ticks, seed=0):
+    started = time.perf_counter()
+    sim, races, crashes = run(ticks, seed)
+    elapsed = time.perf_counter() - started
+    print(f"{ticks} ticks in {elapsed:.2f}s: {ticks / elapsed:,.0f} ticks/s "
+          f"({ticks / elapsed / FPS:,.0f}x real time at {FPS} FPS), {races} races finished, {crashes} crashes")
+    deterministic = run(min(ticks, 20000), seed)[0].snapshot() == run(min(ticks, 20000), seed)[0].snapshot()
+    print(f"Same seed, same result: {deterministic}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless car-race simulation")
+    parser.add_argument("--benchmark", action="store_true", help="measure simulation ticks per second")
+    parser.add_argument("--ticks", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.ticks, args.seed)
+    else:
+        sim = RaceSim(seed=args.seed)
+        driver = random_driver(args.seed)
+        while not sim.done:
+            sim.step(*next(driver))
+        print(f"Race over after {sim.ticks} ticks: {sim.lives} lives left, {sim.time_remaining}s remaining")
+
+
+if __name__ == "__main__":
+    main()
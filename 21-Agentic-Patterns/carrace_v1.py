@@ -1,9 +1,19 @@
 # This Python program implements the following use case:
 # Write code to create a simple car race game with my car and many other moving cars on different lanes like a real race. Use Pygame library for this. The game should have a simple GUI, a scoreboard with time remaining and lives remaining, and should handle edge cases like collisions and out of bounds. The road should be a simple straight road with lanes, and the player car should be controlled by arrow keys. The game should end when the player runs out of lives or time.
 
+import functools
+import os
 import pygame
 import random
 import sys
+import time
+
+from carrace_render import DirtyRectRenderer, cached_text, report_frame_times
+
+# Headless benchmark: python carrace_v1.py --benchmark
+if "--benchmark" in sys.argv:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
 
 pygame.init()
 
@@ -50,42 +60,59 @@ billboards = [
     {'x': WIDTH - BILLBOARD_WIDTH, 'y': HEIGHT // 5 * 4},
 ]
 
-def draw_road():
-    screen.fill((50, 50, 50))
+def build_road_surface():
+    # The static part of the road, rendered once and reused every frame
+    road = pygame.Surface((WIDTH, HEIGHT))
+    road.fill((50, 50, 50))
     for i in range(1, 4):
-        pygame.draw.line(screen, (255, 255, 255), (i * LANE_WIDTH, 0), (i * LANE_WIDTH, HEIGHT), 5)
+        pygame.draw.line(road, (255, 255, 255), (i * LANE_WIDTH, 0), (i * LANE_WIDTH, HEIGHT), 5)
+    return road.convert()
+
+renderer = DirtyRectRenderer(screen, build_road_surface())
+
+def draw_road():
+    renderer.begin_frame()
     # Draw billboards
     for bb in billboards:
-        screen.blit(billboard_img, (bb['x'], bb['y']))
+        renderer.blit(billboard_img, (bb['x'], bb['y']))
 
-def draw_car(car, color):
+@functools.lru_cache(maxsize=1024)
+def car_sprite(color):
+    # Cars are drawn once per color into a sprite, then blitted
+    sprite = pygame.Surface((CAR_WIDTH, CAR_HEIGHT), pygame.SRCALPHA)
+    car = sprite.get_rect()
     # Draw car body
-    pygame.draw.rect(screen, color, car, border_radius=10)
+    pygame.draw.rect(sprite, color, car, border_radius=10)
     # Draw windows (front and rear)
     window_color = (200, 255, 255)
     window_rect = pygame.Rect(car.x + 10, car.y + 15, car.width - 20, 25)
-    pygame.draw.rect(screen, window_color, window_rect, border_radius=6)
+    pygame.draw.rect(sprite, window_color, window_rect, border_radius=6)
     rear_window_rect = pygame.Rect(car.x + 10, car.y + car.height - 40, car.width - 20, 20)
-    pygame.draw.rect(screen, window_color, rear_window_rect, border_radius=6)
+    pygame.draw.rect(sprite, window_color, rear_window_rect, border_radius=6)
     # Draw wheels
     wheel_color = (30, 30, 30)
     wheel_radius = 10
     # Front wheels
-    pygame.draw.circle(screen, wheel_color, (car.x + 12, car.y + 18), wheel_radius)
-    pygame.draw.circle(screen, wheel_color, (car.x + car.width - 12, car.y + 18), wheel_radius)
+    pygame.draw.circle(sprite, wheel_color, (car.x + 12, car.y + 18), wheel_radius)
+    pygame.draw.circle(sprite, wheel_color, (car.x + car.width - 12, car.y + 18), wheel_radius)
     # Rear wheels
-    pygame.draw.circle(screen, wheel_color, (car.x + 12, car.y + car.height - 18), wheel_radius)
-    pygame.draw.circle(screen, wheel_color, (car.x + car.width - 12, car.y + car.height - 18), wheel_radius)
+    pygame.draw.circle(sprite, wheel_color, (car.x + 12, car.y + car.height - 18), wheel_radius)
+    pygame.draw.circle(sprite, wheel_color, (car.x + car.width - 12, car.y + car.height - 18), wheel_radius)
     # Draw a simple roof stripe
     stripe_color = (255, 255, 255)
     stripe_rect = pygame.Rect(car.x + car.width // 2 - 5, car.y + 30, 10, car.height - 60)
-    pygame.draw.rect(screen, stripe_color, stripe_rect, border_radius=3)
+    pygame.draw.rect(sprite, stripe_color, stripe_rect, border_radius=3)
+    return sprite
+
+def draw_car(car, color):
+    renderer.blit(car_sprite(color), car.topleft)
 
 def draw_scoreboard(time_remaining, lives_remaining):
-    time_text = font.render(f"Time: {time_remaining}s", True, (255, 255, 255))
-    lives_text = font.render(f"Lives: {lives_remaining}", True, (255, 255, 255))
-    screen.blit(time_text, (10, 10))
-    screen.blit(lives_text, (WIDTH - 150, 10))
+    # Text surfaces are re-rendered only when the values change
+    time_text = cached_text(font, f"Time: {time_remaining}s", (255, 255, 255))
+    lives_text = cached_text(font, f"Lives: {lives_remaining}", (255, 255, 255))
+    renderer.blit(time_text, (10, 10))
+    renderer.blit(lives_text, (WIDTH - 150, 10))
 
 def move_enemies():
     # Move cars and remove if out of bounds
@@ -209,11 +236,43 @@ def main():
             draw_car(car['rect'], (255, 0, 0))
 
         draw_scoreboard(time_remaining, lives_remaining)
-        pygame.display.flip()
+        renderer.end_frame()
 
     game_over_screen()
     pygame.time.wait(500)
     pygame.quit()
 
+def benchmark(frames=600):
+    """
+    Headless frame-time measurement (dummy SDL video driver): the per-frame game logic and
+    drawing without the FPS cap or input, once redrawing the full screen every frame and once
+    updating only dirty rectangles.
+    """
+    for full_redraw in (True, False):
+        random.seed(0)
+        enemy_cars.clear()
+        renderer.full_redraw = full_redraw
+        renderer.invalidate()
+        frame_ms = []
+        for _ in range(frames):
+            started = time.perf_counter()
+            draw_road()
+            move_billboards(car_speed)
+            spawn_enemy()
+            move_enemies()
+            if check_collisions():
+                enemy_cars.clear()
+            draw_car(player_car, (0, 255, 0))
+            for car in enemy_cars:
+                draw_car(car['rect'], (255, 0, 0))
+            draw_scoreboard(GAME_TIME, LIVES)
+            renderer.end_frame()
+            frame_ms.append((time.perf_counter() - started) * 1000)
+        report_frame_times("full redraw" if full_redraw else "dirty rects", frame_ms, FPS)
+    pygame.quit()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if "--benchmark" in sys.argv:
+        benchmark()
+    else:
+        main()
\ No newline at end of file
@@ -1,163 +1,128 @@
 # This Python program implements the following use case:
 # Write code to create a simple car race game with my car and many other moving cars on different lanes like a real race. Use Pygame library for this. The game should have a simple GUI, a scoreboard with time remaining and lives remaining, and should handle edge cases like collisions and out of bounds. The road should be a simple straight road with lanes, and the player car should be controlled by arrow keys. The game should end when the player runs out of lives or time.
 
+import argparse
+import functools
+import os
 import pygame
-import random
 import sys
+import time
+
+from carrace_render import DirtyRectRenderer, cached_text, report_frame_times
+from carrace_sim import (BILLBOARD_HEIGHT, BILLBOARD_WIDTH, CAR_HEIGHT, CAR_WIDTH, FPS, HEIGHT, LANE_WIDTH,
+                         WIDTH, Car, RaceSim)
+
+# Headless stress test / benchmark: python carrace_v2.py --stress 5000 (or --benchmark)
+parser = argparse.ArgumentParser(description="Car race game")
+parser.add_argument("--stress", type=int, metavar="N_CARS", help="headless frame times with N_CARS enemies")
+parser.add_argument("--benchmark", action="store_true", help="headless frame times with normal traffic")
+args = parser.parse_args() if __name__ == "__main__" else parser.parse_args([])
+if args.stress is not None and args.stress < 1:
+    parser.error("--stress needs a positive number of cars")
+if args.stress or args.benchmark:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
 
 pygame.init()
 
-WIDTH, HEIGHT = 800, 600
-LANE_WIDTH = WIDTH // 4
-CAR_WIDTH, CAR_HEIGHT = 50, 100
-FPS = 60
-GAME_TIME = 60
-LIVES = 3
-
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Car Race Game")
 
 font = pygame.font.SysFont(None, 36)
 large_font = pygame.font.SysFont(None, 48)  # Larger font for car numbers
 
-player_car = pygame.Rect(WIDTH // 2 - CAR_WIDTH // 2, HEIGHT - CAR_HEIGHT - 10, CAR_WIDTH, CAR_HEIGHT)
-enemy_cars = []  # Now stores dicts: {'rect': pygame.Rect, 'speed': int, 'lane': int, 'number': int}
-
 clock = pygame.time.Clock()
 
 # Load sounds
 move_sound = pygame.mixer.Sound("move.wav")
 crash_sound = pygame.mixer.Sound("crash.wav")
 
-# Add billboard positions and speed
-BILLBOARD_WIDTH = 16
-BILLBOARD_HEIGHT = 80
+# Billboard image; positions and movement live in the simulation
 billboard_img = pygame.Surface((BILLBOARD_WIDTH, BILLBOARD_HEIGHT))
 billboard_img.fill((200, 200, 0))
-billboards = [
-    # Leftmost edge of left track
-    {'x': 0, 'y': 0},
-    {'x': 0, 'y': HEIGHT // 3},
-    {'x': 0, 'y': 2 * HEIGHT // 3},
-    {'x': 0, 'y': HEIGHT // 2},
-    {'x': 0, 'y': HEIGHT // 5},
-    {'x': 0, 'y': HEIGHT // 5 * 4},
-    # Rightmost edge of right track
-    {'x': WIDTH - BILLBOARD_WIDTH, 'y': HEIGHT // 6},
-    {'x': WIDTH - BILLBOARD_WIDTH, 'y': HEIGHT // 2},
-    {'x': WIDTH - BILLBOARD_WIDTH, 'y': HEIGHT // 3},
-    {'x': WIDTH - BILLBOARD_WIDTH, 'y': HEIGHT // 5 * 3},
-    {'x': WIDTH - BILLBOARD_WIDTH, 'y': HEIGHT // 5},
-    {'x': WIDTH - BILLBOARD_WIDTH, 'y': HEIGHT // 5 * 4},
-]
-
-def draw_road():
-    screen.fill((50, 50, 50))
+
+def build_road_surface():
+    # The static part of the road, rendered once and reused every frame
+    road = pygame.Surface((WIDTH, HEIGHT))
+    road.fill((50, 50, 50))
     for i in range(1, 4):
-        pygame.draw.line(screen, (255, 255, 255), (i * LANE_WIDTH, 0), (i * LANE_WIDTH, HEIGHT), 5)
-    # Draw billboards
-    for bb in billboards:
-        screen.blit(billboard_img, (bb['x'], bb['y']))
+        pygame.draw.line(road, (255, 255, 255), (i * LANE_WIDTH, 0), (i * LANE_WIDTH, HEIGHT), 5)
+    return road.convert()
 
-def draw_car(car, color, number=None):
+renderer = DirtyRectRenderer(screen, build_road_surface())
+
+def draw_road(billboards):
+    renderer.begin_frame()
+    # Draw billboards
+    for x, y in billboards:
+        renderer.blit(billboard_img, (x, y))
+
+@functools.lru_cache(maxsize=None)
+def car_sprite(color, size=(CAR_WIDTH, CAR_HEIGHT)):
+    # Car bodies are drawn once per color and size, so the cache stays as small as the palette;
+    # numbers are blitted on top per frame (see draw_car)
+    sprite = pygame.Surface(size, pygame.SRCALPHA)
+    car = sprite.get_rect()
     # Draw car body
-    pygame.draw.rect(screen, color, car, border_radius=10)
+    pygame.draw.rect(sprite, color, car, border_radius=10)
     # Draw windows (front and rear)
     window_color = (200, 255, 255)
     window_rect = pygame.Rect(car.x + 10, car.y + 15, car.width - 20, 25)
-    pygame.draw.rect(screen, window_color, window_rect, border_radius=6)
+    pygame.draw.rect(sprite, window_color, window_rect, border_radius=6)
     rear_window_rect = pygame.Rect(car.x + 10, car.y + car.height - 40, car.width - 20, 20)
-    pygame.draw.rect(screen, window_color, rear_window_rect, border_radius=6)
+    pygame.draw.rect(sprite, window_color, rear_window_rect, border_radius=6)
     # Draw wheels
     wheel_color = (30, 30, 30)
     wheel_radius = 10
     # Front wheels
-    pygame.draw.circle(screen, wheel_color, (car.x + 12, car.y + 18), wheel_radius)
-    pygame.draw.circle(screen, wheel_color, (car.x + car.width - 12, car.y + 18), wheel_radius)
+    pygame.draw.circle(sprite, wheel_color, (car.x + 12, car.y + 18), wheel_radius)
+    pygame.draw.circle(sprite, wheel_color, (car.x + car.width - 12, car.y + 18), wheel_radius)
     # Rear wheels
-    pygame.draw.circle(screen, wheel_color, (car.x + 12, car.y + car.height - 18), wheel_radius)
-    pygame.draw.circle(screen, wheel_color, (car.x + car.width - 12, car.y + car.height - 18), wheel_radius)
+    pygame.draw.circle(sprite, wheel_color, (car.x + 12, car.y + car.height - 18), wheel_radius)
+    pygame.draw.circle(sprite, wheel_color, (car.x + car.width - 12, car.y + car.height - 18), wheel_radius)
     # Draw a simple roof stripe
     stripe_color = (255, 255, 255)
     stripe_rect = pygame.Rect(car.x + car.width // 2 - 5, car.y + 30, 10, car.height - 60)
-    pygame.draw.rect(screen, stripe_color, stripe_rect, border_radius=3)
-    # Draw car number if provided, centered vertically and horizontally
+    pygame.draw.rect(sprite, stripe_color, stripe_rect, border_radius=3)
+    return sprite
+
+def draw_car(car, color, number=None):
+    renderer.blit(car_sprite(color), (car.x, car.y))
+    # Draw car number if provided, centered vertically and horizontally. It is built from
+    # per-character glyphs, so thousands of numbered cars need only a dozen cached surfaces
     if number is not None:
-        num_text = large_font.render(str(number), True, (0, 0, 0))
-        center_x = car.x + car.width // 2 - num_text.get_width() // 2
-        center_y = car.y + car.height // 2 - num_text.get_height() // 2
-        screen.blit(num_text, (center_x, center_y))
+        glyphs = [cached_text(large_font, char, (0, 0, 0)) for char in str(number)]
+        x = car.x + CAR_WIDTH // 2 - sum(glyph.get_width() for glyph in glyphs) // 2
+        for glyph in glyphs:
+            # Inside the car's rectangle, which the renderer already tracks
+            screen.blit(glyph, (x, car.y + CAR_HEIGHT // 2 - glyph.get_height() // 2))
+            x += glyph.get_width()
 
 def draw_scoreboard(time_remaining, lives_remaining):
-    time_text = font.render(f"Time: {time_remaining}s", True, (255, 255, 255))
-    lives_text = font.render(f"Lives: {lives_remaining}", True, (255, 255, 255))
-    screen.blit(time_text, (10, 10))
-    screen.blit(lives_text, (WIDTH - 150, 10))
-
-def move_enemies():
-    # Move cars and remove if out of bounds
-    for car in enemy_cars[:]:
-        car['rect'].y += car['speed']
-        if car['rect'].y > HEIGHT:
-            enemy_cars.remove(car)
-    # Check for enemy-enemy collisions and remove both if they collide
-    for i in range(len(enemy_cars)):
-        for j in range(i + 1, len(enemy_cars)):
-            if enemy_cars[i]['rect'].colliderect(enemy_cars[j]['rect']):
-                # Remove both cars if they collide
-                if enemy_cars[i] in enemy_cars:
-                    enemy_cars.remove(enemy_cars[i])
-                if enemy_cars[j] in enemy_cars:
-                    enemy_cars.remove(enemy_cars[j])
-                break  # Restart loop as list changed
-
-def check_collisions():
-    for car in enemy_cars:
-        if player_car.colliderect(car['rect']):
-            return True
-    return False
-
-def spawn_enemy():
-    # Decrease spawn rate: spawn only if random number is 1 out of 40
-    if random.randint(1, 40) == 1:
-        lane = random.choice([0, 1, 2, 3])
-        # Only spawn if no car is in this lane
-        lane_occupied = any(car['lane'] == lane for car in enemy_cars)
-        if not lane_occupied:
-            enemy_rect = pygame.Rect(lane * LANE_WIDTH + (LANE_WIDTH - CAR_WIDTH) // 2, -CAR_HEIGHT, CAR_WIDTH, CAR_HEIGHT)
-            speed = random.randint(4, 10)
-            car_number = len(enemy_cars) + 1
-            # Prevent overlap at spawn (shouldn't happen due to lane check, but extra safety)
-            if not any(enemy_rect.colliderect(c['rect']) for c in enemy_cars):
-                enemy_cars.append({'rect': enemy_rect, 'speed': speed, 'lane': lane, 'number': car_number})
-
-def move_billboards(accel_speed):
-    for bb in billboards:
-        bb['y'] += accel_speed
-        if bb['y'] > HEIGHT:
-            bb['y'] = -BILLBOARD_HEIGHT
-            # Keep x at leftmost or rightmost edge
+    # Text surfaces are re-rendered only when the values change
+    time_text = cached_text(font, f"Time: {time_remaining}s", (255, 255, 255))
+    lives_text = cached_text(font, f"Lives: {lives_remaining}", (255, 255, 255))
+    renderer.blit(time_text, (10, 10))
+    renderer.blit(lives_text, (WIDTH - 150, 10))
+
+def draw(sim):
+    draw_road(sim.billboards)
+    draw_car(sim.player, (0, 255, 0), "P")
+    for car in sim.enemies.visible():
+        draw_car(car, (255, 0, 0), car.number)
+    draw_scoreboard(sim.time_remaining, sim.lives)
+    renderer.end_frame()
 
 def handle_input():
     keys = pygame.key.get_pressed()
-    moving = False
-    global car_speed, accelerating
-    accelerating = False
-    if keys[pygame.K_LEFT] and player_car.x > 0:
-        player_car.x -= 5
-        moving = True
-    if keys[pygame.K_RIGHT] and player_car.x < WIDTH - CAR_WIDTH:
-        player_car.x += 5
-        moving = True
-    if keys[pygame.K_UP]:
-        accelerating = True
-        moving = True
+    left, right, accelerating = keys[pygame.K_LEFT], keys[pygame.K_RIGHT], keys[pygame.K_UP]
     # Play move sound only if moving and not already playing
-    if moving or accelerating:
+    if left or right or accelerating:
         if not pygame.mixer.Channel(1).get_busy():
             pygame.mixer.Channel(1).play(move_sound, loops=-1)
     else:
         pygame.mixer.Channel(1).stop()
+    return left, right, accelerating
 
 def game_over_screen():
     screen.fill((0, 0, 0))
@@ -166,62 +131,70 @@ def game_over_screen():
     pygame.display.flip()
     pygame.time.wait(2000)
 
-# Add car speed and acceleration
-car_speed = 5
-accelerating = False
-
 def main():
-    global car_speed, accelerating
-    running = True
-    lives_remaining = LIVES
-    start_ticks = pygame.time.get_ticks()
+    sim = RaceSim()
+    # The simulation advances in fixed 1/FPS ticks; a slow frame runs several ticks
+    # (capped, so a stall does not fast-forward the race) and a fast one may run none
+    accumulator = 0.0
 
-    while running:
-        clock.tick(FPS)
-        draw_road()
-
-        time_remaining = GAME_TIME - (pygame.time.get_ticks() - start_ticks) // 1000
-        if time_remaining <= 0:
-            running = False
+    while not sim.done:
+        accumulator += min(clock.tick(FPS) / 1000, 0.25)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
 
-        handle_input()
-
-        # Accelerate if UP is pressed, else slow down
-        if accelerating:
-            car_speed = min(car_speed + 0.2, 18)
-        else:
-            car_speed = max(car_speed - 0.15, 5)
-
-        move_billboards(car_speed)
-        spawn_enemy()
-        move_enemies()
-
-        if check_collisions():
-            pygame.mixer.Channel(2).play(crash_sound)
-            lives_remaining -= 1
-            if lives_remaining <= 0:
-                running = False
-            else:
-                player_car.x = WIDTH // 2 - CAR_WIDTH // 2
-                player_car.y = HEIGHT - CAR_HEIGHT - 10
-                enemy_cars.clear()
-                car_speed = 5
-
-        draw_car(player_car, (0, 255, 0), "P")
-        for car in enemy_cars:
-            draw_car(car['rect'], (255, 0, 0), car['number'])
+        controls = handle_input()
+        while accumulator >= sim.dt and not sim.done:
+            if "crash" in sim.step(*controls):
+                pygame.mixer.Channel(2).play(crash_sound)
+            accumulator -= sim.dt
 
-        draw_scoreboard(time_remaining, lives_remaining)
-        pygame.display.flip()
+        draw(sim)
 
     game_over_screen()
     pygame.time.wait(500)
     pygame.quit()
 
+def run_frames(sim, frames, full_redraw):
+    """One simulation tick and one draw per frame, without the FPS cap or input; returns frame times in ms."""
+    renderer.full_redraw = full_redraw
+    renderer.invalidate()
+    frame_ms = []
+    for _ in range(frames):
+        started = time.perf_counter()
+        sim.step()
+        draw(sim)
+        frame_ms.append((time.perf_counter() - started) * 1000)
+    return frame_ms
+
+def benchmark(frames=600):
+    """Headless frame times (dummy SDL video driver) with normal traffic: full redraw vs dirty rects."""
+    for full_redraw in (True, False):
+        sim = RaceSim(seed=0, lives=frames + 1)  # crashes clear the road but never end the run
+        report_frame_times("full redraw" if full_redraw else "dirty rects", run_frames(sim, frames, full_redraw), FPS)
+    pygame.quit()
+
+def stress_test(n_cars, frames=600):
+    """
+    Headless frame-time measurement with `n_cars` enemies queued on a long road above the
+    screen (spaced out and all moving at the same speed, so they roll into view without colliding).
+    """
+    sim = RaceSim(seed=0, game_time=frames, spawn_odds=0)
+    for n in range(n_cars):
+        lane = n % 4
+        y = -CAR_HEIGHT - (n // 4) * (CAR_HEIGHT + 20)
+        sim.enemies.add(Car(lane * LANE_WIDTH + (LANE_WIDTH - CAR_WIDTH) // 2, y, speed=6, lane=lane, number=n + 1))
+    # Park the player outside the lanes so the run is not cut short by crashes
+    sim.player.x = -CAR_WIDTH * 2
+    report_frame_times(f"{n_cars} cars", run_frames(sim, frames, full_redraw=False), FPS)
+    pygame.quit()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if args.stress:
+        stress_test(args.stress)
+    elif args.benchmark:
+        benchmark()
+    else:
+        main()
@@ -0,0 +1,80 @@
+"""
+Offline evaluation of the local query classifier against logged LLM classifications.
+
+Trains on a split of classification_log.jsonl and reports, on the held-out part:
+agreement with the LLM, coverage (share answered locally at the confidence threshold)
+and the classifier latency saved compared with the logged LLM round-trips.
+
+Usage:
+    python evaluate_query_classifier.py [--log classification_log.jsonl] [--threshold 0.85] [--save]
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from query_classifier import LOG_FILE, MODEL_FILE, LocalQueryClassifier, read_log, train_from_log
+
+
+def evaluate(records, threshold: float, test_share: float = 0.2, seed: int = 0):
+    records = list(records)
+    random.Random(seed).shuffle(records)
+    split = max(1, int(len(records) * test_share))
+    test, train = records[:split], records[split:]
+    model = LocalQueryClassifier().train([(r["prompt"], r["label"]) for r in train])
+
+    agree = confident = confident_agree = 0
+    local_seconds = []
+    for record in test:
+        started = time.perf_counter()
+        label, confidence = model.predict(record["prompt"])
+        local_seconds.append(time.perf_counter() - started)
+        agree += label == record["label"]
+        if confidence >= threshold:
+            confident += 1
+            confident_agree += label == record["label"]
+
+    llm_seconds = [r["latency"] for r in test if r.get("latency")]
+    llm_mean = statistics.mean(llm_seconds) if llm_seconds else 0.0
+    local_mean = statistics.mean(local_seconds)
+    return {
+        "train": len(train),
+        "test": len(test),
+        "agreement": agree / len(test),
+        "coverage": confident / len(test),
+        "agreement_when_confident": confident_agree / confident if confident else 0.0,
+        "local_latency_us": local_mean * 1e6,
+        "llm_latency_ms": llm_mean * 1e3,
+        # Confident prompts skip the LLM round-trip entirely
+        "latency_saved_s": confident * (llm_mean - local_mean),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", default=LOG_FILE)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--save", action="store_true", help=f"train on the whole log and write {MODEL_FILE}")
+    args = parser.parse_args()
+
+    records = read_log(args.log)
+    if len(records) < 10:
+        print(f"Only {len(records)} labelled prompts in {args.log}; log more LLM classifications first.")
+        return
+
+    report = evaluate(records, args.threshold)
+    print(f"Trained on {report['train']} prompts, evaluated on {report['test']}")
+    print(f"Agreement with LLM:         {report['agreement']:.1%}")
+    print(f"Answered locally (>= {args.threshold}): {report['coverage']:.1%}, agreement {report['agreement_when_confident']:.1%}")
+    print(f"Local latency:              {report['local_latency_us']:.0f} us")
+    print(f"LLM latency (logged):       {report['llm_latency_ms']:.0f} ms")
+    print(f"Latency saved on test set:  {report['latency_saved_s']:.1f} s")
+
+    if args.save:
+        train_from_log(args.log, MODEL_FILE)
+        print(f"Saved model trained on all {len(records)} prompts to {MODEL_FILE}")
+
+
+if __name__ == "__main__":
+    main()
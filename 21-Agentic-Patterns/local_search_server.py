@@ -0,0 +1,120 @@
+"""
+Local stand-in for the Google Custom Search JSON API, for benchmarking the router without keys or quota.
+
+Serves GET /customsearch/v1?q=... with a configurable artificial latency and returns
+{"items": [{"title", "link", "snippet"}, ...]} like the real API.
+
+Usage:
+    python local_search_server.py --port 8765 --delay 0.8
+    GOOGLE_SEARCH_URL=http://127.0.0.1:8765/customsearch/v1 python 16_Resource_Aware_Opt_LLM_Reflection_v1.py
+
+    # Sequential vs speculative routing, with simulated classifier / generation latency
+    python local_search_server.py --benchmark
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from speculative_router import needs_search, route
+
+
+def make_handler(delay: float):
+    class SearchHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/customsearch/v1":
+                self.send_error(404)
+                return
+            params = parse_qs(url.query)
+            query = params.get("q", [""])[0]
+            num = int(params.get("num", ["5"])[0])
+            time.sleep(delay)
+            items = [
+                {"title": f"Result {i + 1} for {query}", "link": f"https://example.com/{i + 1}", "snippet": f"Snippet {i + 1} about {query}."}
+                for i in range(num)
+            ]
+            body = json.dumps({"items": items}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return SearchHandler
+
+
+def start_server(port: int = 8765, delay: float = 0.8) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(delay))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def benchmark(port: int, classify_delay: float, generate_delay: float, runs: int):
+    url = f"http://127.0.0.1:{port}/customsearch/v1"
+    prompts = [
+        ("What is the latest news on the Mars mission?", "Needs Google Search + Info Aggregation using Simple or Reasoning Model"),
+        ("Find the current price of gold", "Needs Google Search + Info Aggregation using Simple or Reasoning Model"),
+        ("What is the capital of France?", "Simple"),
+        ("Find the bug in this recursion proof", "Needs Reasoning Model"),  # heuristic false positive
+    ]
+    labels = dict(prompts)
+
+    def classify(prompt):
+        time.sleep(classify_delay)
+        return labels[prompt], "simulated", "llm"
+
+    def search(prompt):
+        return [item["snippet"] for item in requests.get(url, params={"q": prompt, "num": 5}, timeout=30).json()["items"]]
+
+    def generate(prompt, classification, results):
+        time.sleep(generate_delay)
+        return "simulated response"
+
+    print(f"classifier {classify_delay}s, generation {generate_delay}s, search server at {url}\n")
+    print(f"{'prompt':<48} {'sequential':>10} {'speculative':>11}  speculated")
+    for prompt, _ in prompts:
+        timings = {}
+        for mode, speculate in [("sequential", lambda _: False), ("speculative", needs_search)]:
+            totals = []
+            for _ in range(runs):
+                result = asyncio.run(route(prompt, classify, search, generate, speculate))
+                totals.append(result["timings"]["total_s"])
+            timings[mode] = statistics.median(totals)
+        print(f"{prompt[:48]:<48} {timings['sequential']:>9.2f}s {timings['speculative']:>10.2f}s  {needs_search(prompt)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.8, help="seconds added to every search request")
+    parser.add_argument("--benchmark", action="store_true")
+    parser.add_argument("--classify-delay", type=float, default=0.7)
+    parser.add_argument("--generate-delay", type=float, default=0.5)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.delay)
+    if args.benchmark:
+        benchmark(args.port, args.classify_delay, args.generate_delay, args.runs)
+        server.shutdown()
+        return
+    print(f"Serving fake search results on http://127.0.0.1:{args.port}/customsearch/v1 (delay {args.delay}s)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Local query classifier for the resource-aware router (16_Resource_Aware_Opt_LLM_Reflection_v1.py).
+
+A hashed n-gram logistic regression, trained from logged gpt-4o-mini classifications, that picks
+Simple / Needs Reasoning Model / Needs Google Search in microseconds. The router only falls back
+to the LLM classifier when the local model is less confident than `threshold`, and every LLM
+answer is appended to the log so the model can be retrained on it.
+"""
+
+import json
+import os
+import re
+import time
+import zlib
+
+import numpy as np
+
+LABELS = [
+    "Simple",
+    "Needs Reasoning Model",
+    "Needs Google Search + Info Aggregation using Simple or Reasoning Model",
+]
+
+LOG_FILE = "classification_log.jsonl"
+MODEL_FILE = "query_classifier.npz"
+
+
+def normalize_label(classification: str) -> str:
+    """Maps the LLM's free-form classification ("3. Needs Google ...") onto LABELS, or None."""
+    text = classification.lower()
+    if "google" in text or "search" in text:
+        return LABELS[2]
+    if "reasoning" in text:
+        return LABELS[1]
+    if "simple" in text:
+        return LABELS[0]
+    return None
+
+
+def features(prompt: str, dim: int) -> tuple[np.ndarray, np.ndarray]:
+    """Hashed word unigrams, bigrams and character trigrams, as (indices, values) with unit norm."""
+    words = re.findall(r"\w+|[?!]", prompt.lower())
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    grams += [f"c:{w[i:i + 3]}" for w in words for i in range(max(1, len(w) - 2))]
+    grams.append(f"len:{min(len(words) // 5, 10)}")
+    counts = {}
+    for gram in grams:
+        index = zlib.crc32(gram.encode("utf-8")) % dim
+        counts[index] = counts.get(index, 0.0) + 1.0
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    return indices, values / np.linalg.norm(values)
+
+
+class LocalQueryClassifier:
+    """Multinomial logistic regression over hashed n-gram features, trained with SGD."""
+
+    def __init__(self, dim: int = 2 ** 18, labels=LABELS):
+        self.dim = dim
+        self.labels = list(labels)
+        self.weights = np.zeros((len(self.labels), dim), dtype=np.float32)
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+
+    def _scores(self, indices, values) -> np.ndarray:
+        logits = self.weights[:, indices] @ values + self.bias
+        logits -= logits.max()
+        probs = np.exp(logits)
+        return probs / probs.sum()
+
+    def predict_proba(self, prompt: str) -> dict:
+        return dict(zip(self.labels, self._scores(*features(prompt, self.dim)).tolist()))
+
+    def predict(self, prompt: str) -> tuple[str, float]:
+        """Returns (label, confidence)."""
+        probs = self._scores(*features(prompt, self.dim))
+        best = int(np.argmax(probs))
+        return self.labels[best], float(probs[best])
+
+    def train(self, examples, epochs: int = 20, learning_rate: float = 0.5, l2: float = 1e-5, seed: int = 0):
+        """Trains on [(prompt, label)]; labels not in `self.labels` are ignored."""
+        data = [(features(prompt, self.dim), self.labels.index(label)) for prompt, label in examples if label in self.labels]
+        rng = np.random.default_rng(seed)
+        for epoch in range(epochs):
+            rate = learning_rate / (1 + epoch)
+            for n in rng.permutation(len(data)):
+                (indices, values), target = data[n]
+                gradient = self._scores(indices, values)
+                gradient[target] -= 1.0
+                self.weights[:, indices] -= rate * (np.outer(gradient, values) + l2 * self.weights[:, indices])
+                self.bias -= rate * gradient
+        return self
+
+    def save(self, path: str = MODEL_FILE):
+        np.savez_compressed(path, weights=self.weights, bias=self.bias, labels=np.array(self.labels))
+
+    @classmethod
+    def load(cls, path: str = MODEL_FILE) -> "LocalQueryClassifier":
+        data = np.load(path)
+        model = cls(dim=data["weights"].shape[1], labels=[str(label) for label in data["labels"]])
+        model.weights = data["weights"]
+        model.bias = data["bias"]
+        return model
+
+
+# --- Classification log ---
+def log_classification(prompt: str, classification: str, reasoning: str, latency: float, path: str = LOG_FILE):
+    record = {"prompt": prompt, "classification": classification, "reasoning": reasoning, "latency": latency}
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def read_log(path: str = LOG_FILE) -> list[dict]:
+    """Logged LLM classifications with a recognised label; the latest entry per prompt wins."""
+    if not os.path.exists(path):
+        return []
+    records = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            label = normalize_label(record.get("classification", ""))
+            if label:
+                records[record["prompt"]] = dict(record, label=label)
+    return list(records.values())
+
+
+def train_from_log(log_path: str = LOG_FILE, model_path: str = MODEL_FILE, **train_kwargs) -> LocalQueryClassifier:
+    records = read_log(log_path)
+    model = LocalQueryClassifier().train([(r["prompt"], r["label"]) for r in records], **train_kwargs)
+    model.save(model_path)
+    return model
+
+
+class RoutedClassifier:
+    """
+    Classifies locally and only calls `llm_classify(prompt) -> (classification, reasoning)`
+    when the local confidence is below `threshold` (or no model is trained yet).
+    LLM answers are logged for the next training run.
+    """
+
+    def __init__(self, llm_classify, model: LocalQueryClassifier = None, threshold: float = 0.85, log_path: str = LOG_FILE):
+        self.llm_classify = llm_classify
+        self.model = model
+        self.threshold = threshold
+        self.log_path = log_path
+        self.local_calls = 0
+        self.llm_calls = 0
+
+    @classmethod
+    def from_files(cls, llm_classify, model_path: str = MODEL_FILE, **kwargs) -> "RoutedClassifier":
+        model = LocalQueryClassifier.load(model_path) if os.path.exists(model_path) else None
+        return cls(llm_classify, model, **kwargs)
+
+    def classify(self, prompt: str) -> tuple[str, str, str]:
+        """Returns (classification, reasoning, source) where source is "local" or "llm"."""
+        if self.model is not None:
+            label, confidence = self.model.predict(prompt)
+            if confidence >= self.threshold:
+                self.local_calls += 1
+                return label, f"Local classifier, confidence {confidence:.2f}.", "local"
+
+        started = time.perf_counter()
+        classification, reasoning = self.llm_classify(prompt)
+        self.llm_calls += 1
+        if self.log_path:
+            log_classification(prompt, classification, reasoning, time.perf_counter() - started, self.log_path)
+        return classification, reasoning, "llm"
@@ -0,0 +1,205 @@
+"""
+Semantic answer cache in front of the compiled RAG graph (retrieve -> generate).
+
+A new question reuses a cached `generation` when its embedding is within `threshold`
+cosine similarity of a cached question and retrieval still returns the same documents,
+so reworded repeats skip the LLM call. The question is embedded once and that vector is
+also used for retrieval. Questions the retriever answers from keywords alone (rag.hybrid's
+fast path) are first looked up by normalized text; they are only embedded when a cached
+entry retrieved exactly the same documents, to check that it is a rewording.
+Entries expire after `ttl` seconds and the least recently used entry is evicted beyond `max_entries`.
+"""
+
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+def documents_fingerprint(documents: List[Document]) -> str:
+    """Order-independent hash of a retrieved document set."""
+    keys = sorted(doc.id or hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest() for doc in documents)
+    return hashlib.sha256("\n".join(keys).encode("utf-8")).hexdigest()
+
+
+def normalize_question(question: str) -> str:
+    """Lexical cache key: lowercase, punctuation stripped, whitespace collapsed."""
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", "", question.lower())).strip()
+
+
+@dataclass
+class CacheEntry:
+    key: int
+    question: str
+    vector: Optional[np.ndarray]  # None for entries cached by text only
+    fingerprint: str
+    generation: str
+    created_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stale: int = 0  # similar question, but the retrieved documents changed
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class SemanticAnswerCache:
+    """Question-embedding keyed cache of generations with TTL and LRU eviction."""
+
+    def __init__(self, embeddings, threshold: float = 0.92, ttl: float = 3600, max_entries: int = 1000):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._by_text = {}  # normalized question -> entry key
+        self._by_fingerprint = {}  # documents fingerprint -> entry keys
+        self._next_id = 0
+        self._matrix = None  # stacked entry vectors, rebuilt lazily after changes
+        self._matrix_ids = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remove(self, key: int):
+        entry = self._entries.pop(key)
+        text_key = normalize_question(entry.question)
+        if self._by_text.get(text_key) == key:
+            del self._by_text[text_key]
+        keys = self._by_fingerprint[entry.fingerprint]
+        keys.discard(key)
+        if not keys:
+            del self._by_fingerprint[entry.fingerprint]
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl]
+        for key in expired:
+            self._remove(key)
+        if expired:
+            self.stats.expirations += len(expired)
+            self._matrix = None
+
+    def candidates(self, vector: np.ndarray) -> List[CacheEntry]:
+        """Live entries within the similarity threshold, most similar first."""
+        self._expire()
+        if self._matrix is None:
+            self._matrix_ids = [key for key, entry in self._entries.items() if entry.vector is not None]
+            if not self._matrix_ids:
+                return []
+            self._matrix = np.stack([self._entries[key].vector for key in self._matrix_ids])
+        scores = self._matrix @ vector
+        order = np.argsort(-scores)
+        return [
+            self._entries[self._matrix_ids[i]] for i in order
+            if scores[i] >= self.threshold
+        ]
+
+    def lookup_text(self, question: str) -> Optional[CacheEntry]:
+        """Live entry for the same question up to case, punctuation and spacing."""
+        self._expire()
+        key = self._by_text.get(normalize_question(question))
+        return self._entries.get(key) if key is not None else None
+
+    def with_fingerprint(self, fingerprint: str) -> List[CacheEntry]:
+        """Live entries cached for exactly this retrieved document set."""
+        self._expire()
+        return [self._entries[key] for key in self._by_fingerprint.get(fingerprint, ())]
+
+    def similar(self, vector: np.ndarray, entries: List[CacheEntry]) -> List[CacheEntry]:
+        """`entries` within the similarity threshold, most similar first; text-only entries are embedded now."""
+        for entry in entries:
+            if entry.vector is None:
+                entry.vector = self.embed(entry.question)
+                self._matrix = None
+        scored = sorted(((float(entry.vector @ vector), entry) for entry in entries), key=lambda item: -item[0])
+        return [entry for score, entry in scored if score >= self.threshold]
+
+    def touch(self, entry: CacheEntry):
+        """Marks `entry` as most recently used."""
+        if entry.key in self._entries:
+            self._entries.move_to_end(entry.key)
+
+    def put(self, question: str, vector: Optional[np.ndarray], documents: List[Document], generation: str):
+        entry = self._entries[self._next_id] = CacheEntry(self._next_id, question, vector, documents_fingerprint(documents), generation)
+        self._by_text[normalize_question(question)] = self._next_id
+        self._by_fingerprint.setdefault(entry.fingerprint, set()).add(self._next_id)
+        self._next_id += 1
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.stats.evictions += 1
+        self._matrix = None
+
+
+class CachedRAGApp:
+    """
+    Wraps a compiled RAG graph and its retriever with a SemanticAnswerCache.
+    `invoke` has the same input/output contract as the graph. Documents retrieved for the
+    cache check are passed to the graph in the input state, so its retrieve node must
+    keep `documents` that are already set instead of retrieving again. A retriever with
+    `documents_for_vector` (rag.hybrid) reuses the cache's question embedding.
+    """
+
+    def __init__(self, app, retriever, cache: SemanticAnswerCache):
+        self.app = app
+        self.retriever = retriever
+        self.cache = cache
+
+    def _retrieve(self, question: str, vector: np.ndarray) -> List[Document]:
+        documents_for_vector = getattr(self.retriever, "documents_for_vector", None)
+        return documents_for_vector(question, vector) if documents_for_vector else self.retriever.invoke(question)
+
+    def invoke(self, inputs: dict) -> dict:
+        question = inputs["question"]
+        keyword_documents = getattr(self.retriever, "keyword_documents", None)
+        documents = keyword_documents(question) if keyword_documents else None
+        vector = None
+        if documents is not None:
+            # Keyword fast path: retrieval needed no embedding. The same question (up to case and
+            # punctuation) needs none either; a rewording is only embedded if a cached question
+            # retrieved exactly these documents
+            fingerprint = documents_fingerprint(documents)
+            entry = self.cache.lookup_text(question)
+            candidates = [entry] if entry else []
+            if entry is None or entry.fingerprint != fingerprint:
+                same_documents = self.cache.with_fingerprint(fingerprint)
+                if same_documents:
+                    vector = self.cache.embed(question)
+                    candidates += self.cache.similar(vector, same_documents)
+        else:
+            # Embedded once: the same vector serves the cache lookup, retrieval and the graph
+            vector = self.cache.embed(question)
+            candidates = self.cache.candidates(vector)
+            documents = self._retrieve(question, vector)
+        if candidates:
+            fingerprint = documents_fingerprint(documents)
+            for entry in candidates:
+                if entry.fingerprint == fingerprint:
+                    self.cache.stats.hits += 1
+                    self.cache.touch(entry)
+                    return {"question": question, "documents": documents, "generation": entry.generation}
+            self.cache.stats.stale += 1
+
+        self.cache.stats.misses += 1
+        result = self.app.invoke({**inputs, "documents": documents})
+        self.cache.put(question, vector, result["documents"], result["generation"])
+        return result
@@ -0,0 +1,163 @@
+"""
+Hybrid lexical + dense retrieval for the RAG examples.
+
+A BM25 inverted index is precomputed over the chunks: every posting already stores its
+full BM25 term weight, so scoring a query is a few numpy scatter-adds. Lexical and vector
+rankings are merged with reciprocal-rank fusion. When the lexical match is clearly
+decisive (e.g. exact names such as "Justice Breyer") the query is answered from BM25
+alone and is never embedded.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+# Generic English function words; nothing corpus- or query-specific
+STOPWORDS = {
+    "a", "about", "after", "all", "also", "am", "an", "and", "any", "are", "as", "at", "be",
+    "been", "before", "being", "but", "by", "can", "could", "did", "do", "does", "for", "from",
+    "had", "has", "have", "he", "her", "his", "how", "i", "if", "in", "into", "is", "it", "its",
+    "me", "my", "no", "not", "of", "on", "or", "our", "she", "so", "some", "such", "than", "that",
+    "the", "their", "them", "then", "there", "these", "they", "this", "those", "to", "too", "up",
+    "us", "very", "was", "we", "were", "what", "when", "where", "which", "who", "whom", "why",
+    "will", "with", "would", "you", "your",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in re.findall(r"\w+", text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Inverted index with precomputed BM25 weights per (term, document) posting."""
+
+    def __init__(self, documents: List[Document], k1: float = 1.5, b: float = 0.75):
+        self.documents = list(documents)
+        n_docs = len(self.documents)
+        lengths = np.zeros(n_docs, dtype=np.float32)
+        postings = defaultdict(list)
+        for i, doc in enumerate(self.documents):
+            counts = Counter(tokenize(doc.page_content))
+            lengths[i] = sum(counts.values())
+            for term, tf in counts.items():
+                postings[term].append((i, tf))
+        avg_length = float(lengths.mean()) if n_docs else 0.0
+
+        self.idf = {}
+        self.postings = {}
+        for term, entries in postings.items():
+            docs = np.fromiter((i for i, _ in entries), dtype=np.int32, count=len(entries))
+            tf = np.fromiter((t for _, t in entries), dtype=np.float32, count=len(entries))
+            idf = math.log(1 + (n_docs - len(entries) + 0.5) / (len(entries) + 0.5))
+            self.idf[term] = idf
+            norm = k1 * (1 - b + b * lengths[docs] / (avg_length or 1))
+            self.postings[term] = (docs, idf * tf * (k1 + 1) / (tf + norm))
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        for term in set(tokenize(query)):
+            if term in self.postings:
+                docs, weights = self.postings[term]
+                np.add.at(scores, docs, weights)
+        return scores
+
+    def idf_coverage(self, query: str, index: int) -> float:
+        """Share of the query's IDF mass (over indexed terms) carried by terms that occur in document `index`."""
+        terms = [term for term in set(tokenize(query)) if term in self.postings]
+        total = sum(self.idf[term] for term in terms)
+        if not total:
+            return 0.0
+        matched = sum(self.idf[term] for term in terms if np.any(self.postings[term][0] == index))
+        return matched / total
+
+    def search(self, query: str, k: int = 4) -> List[tuple]:
+        """Top-k (document index, score) pairs with a positive score."""
+        scores = self.scores(query)
+        hits = int(np.count_nonzero(scores))
+        if not hits:
+            return []
+        k = min(k, hits)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int = 60) -> List[Document]:
+    """Merges ranked lists: each document scores sum(1 / (k + rank)) over the lists it appears in."""
+    scores, by_key = defaultdict(float), {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = doc.id or doc.page_content
+            scores[key] += 1.0 / (k + rank)
+            by_key.setdefault(key, doc)
+    return [by_key[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    BM25 + vector retriever with reciprocal-rank fusion and a keyword-only fast path.
+
+    The fast path is taken when the top BM25 document carries at least `keyword_min_coverage`
+    of the query's IDF mass (`BM25Index.idf_coverage`) and its score is at least
+    `keyword_margin` times the runner-up; the query is then not embedded at all. Both tests
+    are ratios, so they do not depend on the corpus or the absolute BM25 scale.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorstore: object
+    bm25: BM25Index
+    k: int = 4
+    candidates: int = 20
+    rrf_k: int = 60
+    keyword_min_coverage: float = 0.9
+    keyword_margin: float = 1.5
+    keyword_only_hits: int = 0
+    hybrid_hits: int = 0
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore, **kwargs) -> "HybridRetriever":
+        """Builds the BM25 index over every chunk already in `vectorstore`."""
+        return cls(vectorstore=vectorstore, bm25=BM25Index(vectorstore.documents()), **kwargs)
+
+    def _lexically_confident(self, query: str, lexical: List[tuple]) -> bool:
+        if not lexical or self.bm25.idf_coverage(query, lexical[0][0]) < self.keyword_min_coverage:
+            return False
+        runner_up = lexical[1][1] if len(lexical) > 1 else 0.0
+        return lexical[0][1] >= self.keyword_margin * runner_up
+
+    def keyword_documents(self, query: str) -> Optional[List[Document]]:
+        """The top-k documents if the keyword-only fast path applies to `query`, else None."""
+        lexical = self.bm25.search(query, self.candidates)
+        if not self._lexically_confident(query, lexical):
+            return None
+        self.keyword_only_hits += 1
+        return [self.bm25.documents[i] for i, _ in lexical[: self.k]]
+
+    def documents_for_vector(self, query: str, embedding) -> List[Document]:
+        """Hybrid retrieval with an already computed query embedding, so the query is not embedded again."""
+        return self._retrieve(query, embedding)
+
+    def _retrieve(self, query: str, embedding=None) -> List[Document]:
+        lexical = self.bm25.search(query, self.candidates)
+        lexical_docs = [self.bm25.documents[i] for i, _ in lexical]
+        if self._lexically_confident(query, lexical):
+            self.keyword_only_hits += 1
+            return lexical_docs[: self.k]
+
+        self.hybrid_hits += 1
+        if embedding is None:
+            dense_docs = self.vectorstore.similarity_search(query, k=self.candidates)
+        else:
+            dense_docs = self.vectorstore.similarity_search_by_vector(embedding, k=self.candidates)
+        return reciprocal_rank_fusion([lexical_docs, dense_docs], self.rrf_k)[: self.k]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun = None) -> List[Document]:
+        return self._retrieve(query)
@@ -0,0 +1,158 @@
+"""
+Incremental ingestion for the RAG examples: stream documents, chunk them lazily and embed
+only chunks whose content hash is not already in a persistent embedding cache.
+
+Missing chunks are embedded in batches of the provider's maximum batch size, several batches
+at a time. Re-indexing an unchanged corpus therefore makes zero embedding calls.
+Chunks of a re-ingested source that no longer appear in it are deleted from the store.
+"""
+
+import hashlib
+import itertools
+import sqlite3
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List
+
+import numpy as np
+from langchain_core.documents import Document
+
+# OpenAI accepts up to 2048 inputs per embeddings request
+MAX_EMBEDDING_BATCH = 2048
+
+
+def content_hash(text: str, namespace: str = "") -> str:
+    return hashlib.sha256(f"{namespace}\0{text}".encode("utf-8")).hexdigest()
+
+
+def embedding_model_name(embeddings) -> str:
+    """Identifies the embedding model so cached vectors are never mixed across models."""
+    return getattr(embeddings, "model", None) or type(embeddings).__name__
+
+
+class EmbeddingCache:
+    """Persistent content hash -> float32 vector map, stored in SQLite."""
+
+    def __init__(self, path: str = "embedding_cache.sqlite"):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+
+    def get_many(self, hashes: List[str]) -> dict:
+        found = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(hashes), 500):
+                part = hashes[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE hash IN ({','.join('?' * len(part))})", part
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, items: dict):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (hash, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()],
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+def iter_chunks(documents: Iterable[Document], text_splitter) -> Iterator[Document]:
+    """Splits documents one at a time, so the whole corpus is never held in memory."""
+    for document in documents:
+        yield from text_splitter.split_documents([document])
+
+
+@dataclass
+class IngestionStats:
+    chunks: int = 0
+    skipped: int = 0  # already in the store or repeated in the corpus
+    cache_hits: int = 0
+    embedded: int = 0
+    embedding_calls: int = 0
+    deleted: int = 0  # stale chunks of re-ingested sources
+
+
+def ingest(
+    documents: Iterable[Document],
+    text_splitter,
+    embeddings,
+    vectorstore,
+    cache: EmbeddingCache,
+    batch_size: int = MAX_EMBEDDING_BATCH,
+    max_concurrency: int = 4,
+) -> IngestionStats:
+    """
+    Streams `documents` into `vectorstore` (a rag.vector_store.LocalVectorStore).
+    Chunk ids are content hashes, so unchanged chunks already in the store are skipped,
+    cached vectors are reused, and only new text is sent to the embedding provider.
+    Afterwards, chunks stored for any source seen in this run that were not produced again
+    (text removed or changed) are deleted. Sources absent from `documents` are left alone.
+    """
+    stats = IngestionStats()
+    model = embedding_model_name(embeddings)
+    chunks = iter_chunks(documents, text_splitter)
+    seen = defaultdict(set)  # source -> chunk ids produced in this run
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        while True:
+            # Work through the stream in windows of `max_concurrency` full batches
+            window = list(itertools.islice(chunks, batch_size * max_concurrency))
+            if not window:
+                break
+            stats.chunks += len(window)
+
+            pending = {}
+            for chunk in window:
+                source = chunk.metadata.get("source", "")
+                chunk_id = content_hash(chunk.page_content, source)
+                seen[source].add(chunk_id)
+                if chunk_id in pending or vectorstore.get_by_ids([chunk_id]):
+                    stats.skipped += 1
+                    continue
+                pending[chunk_id] = chunk
+            if not pending:
+                continue
+
+            keys = {chunk_id: content_hash(chunk.page_content, model) for chunk_id, chunk in pending.items()}
+            vectors = cache.get_many(list(set(keys.values())))
+            stats.cache_hits += sum(key in vectors for key in keys.values())
+
+            missing = list({key: pending[chunk_id].page_content for chunk_id, key in keys.items() if key not in vectors}.items())
+            batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+            for batch, batch_vectors in zip(batches, pool.map(lambda b: embeddings.embed_documents([t for _, t in b]), batches)):
+                new = {key: vector for (key, _), vector in zip(batch, batch_vectors)}
+                cache.put_many(new)
+                vectors.update(new)
+                stats.embedded += len(new)
+                stats.embedding_calls += 1
+
+            ids = list(pending)
+            vectorstore.add_embeddings(
+                [pending[i].page_content for i in ids],
+                [vectors[keys[i]] for i in ids],
+                [pending[i].metadata for i in ids],
+                ids,
+            )
+
+    stale = [
+        doc.id for doc in vectorstore.documents()
+        if doc.metadata.get("source", "") in seen and doc.id not in seen[doc.metadata.get("source", "")]
+    ]
+    if stale:
+        vectorstore.delete(stale)
+        stats.deleted = len(stale)
+    return stats
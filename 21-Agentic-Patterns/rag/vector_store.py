@@ -0,0 +1,267 @@
+"""
+In-process vector store for the RAG examples, replacing the embedded Weaviate server.
+
+Vectors live in a float32 matrix persisted as a raw file and opened with numpy.memmap,
+so loading an index is instant and only the pages touched by a search are read.
+Documents are kept in an append-only JSONL log next to it (last write per row wins).
+Rows are L2-normalised on insert, which makes cosine top-k a single matrix-vector product.
+"""
+
+import hashlib
+import json
+import os
+import re
+import uuid
+from typing import Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+VECTORS_FILE = "vectors.f32"
+DOCS_FILE = "docs.jsonl"
+META_FILE = "meta.json"
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Offline embedding stand-in: hashed word unigrams and bigrams, L2-normalised.
+    Deterministic and dependency free, good enough to exercise the pipeline without an API key.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        words = re.findall(r"\w+", text.lower())
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for gram in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = hashlib.md5(gram.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dim
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class LocalVectorStore(VectorStore):
+    """
+    LangChain VectorStore backed by a memory-mapped float32 matrix.
+
+    - `add_texts` / `add_documents` upsert by id: existing rows are overwritten in place,
+      new rows are appended (the file grows by doubling).
+    - Search scores every live row with one vectorised dot product and
+      selects the top k with `np.argpartition`.
+    - Pass `persist_directory` to keep the index on disk; without it the store is in memory only.
+    """
+
+    def __init__(self, embedding: Embeddings, persist_directory: str = None):
+        self.embedding = embedding
+        self.persist_directory = persist_directory
+        self.dim = None
+        self._matrix = None  # (capacity, dim) float32, memmap when persisted
+        self._count = 0
+        self._live = np.zeros(0, dtype=bool)
+        self._ids, self._texts, self._metadatas = [], [], []
+        self._row_of = {}
+        if persist_directory:
+            os.makedirs(persist_directory, exist_ok=True)
+            self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    # --- Storage ---
+    def _path(self, name: str) -> str:
+        return os.path.join(self.persist_directory, name)
+
+    def _load(self):
+        if not os.path.exists(self._path(META_FILE)):
+            return
+        with open(self._path(META_FILE), "r", encoding="utf-8") as f:
+            self.dim = json.load(f)["dim"]
+        records = {}
+        with open(self._path(DOCS_FILE), "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    records[record["row"]] = record
+        self._count = max(records) + 1 if records else 0
+        capacity = os.path.getsize(self._path(VECTORS_FILE)) // (4 * self.dim)
+        self._matrix = np.memmap(self._path(VECTORS_FILE), dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._ids = [None] * self._count
+        self._texts = [""] * self._count
+        self._metadatas = [{}] * self._count
+        self._live = np.zeros(capacity, dtype=bool)
+        for row, record in records.items():
+            if record.get("deleted"):
+                continue
+            self._ids[row] = record["id"]
+            self._texts[row] = record["text"]
+            self._metadatas[row] = record.get("metadata") or {}
+            self._live[row] = True
+            self._row_of[record["id"]] = row
+
+    def _ensure_capacity(self, rows: int):
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, 2 * capacity, 1024)
+        if self.persist_directory:
+            if self._matrix is not None:
+                self._matrix.flush()
+                del self._matrix
+            else:
+                with open(self._path(META_FILE), "w", encoding="utf-8") as f:
+                    json.dump({"dim": self.dim}, f)
+            with open(self._path(VECTORS_FILE), "ab") as f:
+                f.truncate(new_capacity * self.dim * 4)
+            self._matrix = np.memmap(self._path(VECTORS_FILE), dtype=np.float32, mode="r+", shape=(new_capacity, self.dim))
+        else:
+            matrix = np.zeros((new_capacity, self.dim), dtype=np.float32)
+            if self._matrix is not None:
+                matrix[:capacity] = self._matrix
+            self._matrix = matrix
+        self._live = np.concatenate([self._live, np.zeros(new_capacity - len(self._live), dtype=bool)])
+
+    def _log(self, records: List[dict]):
+        if not self.persist_directory:
+            return
+        with open(self._path(DOCS_FILE), "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._matrix.flush()
+
+    # --- Writes ---
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """Upserts precomputed embeddings; used directly by the ingestion pipeline."""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(texts):
+            raise ValueError("Expected one embedding per text.")
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match store dimension {self.dim}.")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+        rows = []
+        for doc_id in ids:
+            row = self._row_of.get(doc_id)
+            if row is None:
+                row = self._count
+                self._count += 1
+                self._row_of[doc_id] = row
+                self._ids.append(doc_id)
+                self._texts.append("")
+                self._metadatas.append({})
+            rows.append(row)
+        self._ensure_capacity(self._count)
+
+        self._matrix[rows] = vectors
+        self._live[rows] = True
+        records = []
+        for row, doc_id, text, metadata in zip(rows, ids, texts, metadatas):
+            self._texts[row] = text
+            self._metadatas[row] = metadata
+            records.append({"row": row, "id": doc_id, "text": text, "metadata": metadata})
+        self._log(records)
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.add_embeddings(texts, self.embedding.embed_documents(texts), metadatas, ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        records = []
+        for doc_id in ids:
+            row = self._row_of.pop(doc_id, None)
+            if row is not None:
+                self._live[row] = False
+                records.append({"row": row, "id": doc_id, "deleted": True})
+        if records:
+            self._log(records)
+        return bool(records)
+
+    def documents(self) -> List[Document]:
+        """All live documents, in insertion order."""
+        return [self._document(row) for row in sorted(self._row_of.values())]
+
+    def get_by_ids(self, ids) -> List[Document]:
+        return [self._document(self._row_of[i]) for i in ids if i in self._row_of]
+
+    # --- Search ---
+    def _document(self, row: int) -> Document:
+        return Document(id=self._ids[row], page_content=self._texts[row], metadata=self._metadatas[row])
+
+    def _top_k(self, query_vector, k: int) -> List[Tuple[int, float]]:
+        if self._matrix is None or not len(self):
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        scores = self._matrix[: self._count] @ query
+        scores = np.where(self._live[: self._count], scores, -np.inf)
+        k = min(k, len(self))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top]
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return [(self._document(row), score) for row, score in self._top_k(embedding, k)]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        # Scores are cosine similarities in [-1, 1]
+        return lambda score: min(1.0, max(0.0, (score + 1.0) / 2.0))
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        persist_directory: str = None,
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        store = cls(embedding, persist_directory=persist_directory)
+        store.add_texts(texts, metadatas, ids)
+        return store
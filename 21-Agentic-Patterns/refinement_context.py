@@ -0,0 +1,201 @@
+"""
+Budgeted context for iterative refinement loops (generate -> critique -> refine).
+
+The reflection loop in AI_agent_basic.ipynb resends every version and critique each round,
+so its prompt tokens grow with the number of rounds; the goal-setting agents send only the
+latest code and critique, and so lose the history of what was already tried.
+RefinementContext keeps only the latest code in full. Earlier rounds are sent as unified diffs
+with a one-line summary of their critique, and older history is dropped first when the token
+budget is reached. The critique always keeps at least `min_feedback_tokens`, even when the code
+alone exceeds the budget. History only fills tokens the replaced loop would have spent (on the
+full critique, and with the "full_history" baseline on earlier rounds), so a prompt is never larger.
+It reports the prompt tokens sent against what the loop it replaces would have sent (`baseline`).
+"""
+
+import difflib
+import functools
+import math
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+try:
+    import tiktoken
+except ImportError:  # fall back to the ~4 characters per token rule of thumb
+    tiktoken = None
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:  # the encoding file is downloaded on first use and may be unreachable
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text))
+
+
+def summarize_feedback(feedback: str, max_chars: int = 160) -> str:
+    """First meaningful line of a critique, used for rounds older than the latest one."""
+    for line in feedback.splitlines():
+        line = line.strip(" -*#\t")
+        if line:
+            return line if len(line) <= max_chars else line[: max_chars - 3] + "..."
+    return ""
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    if count_tokens(text) <= max_tokens:
+        return text
+    # Critiques lead with the main point and tracebacks end with the error, so keep both ends
+    keep = max(0, max_tokens * 4 // 2)
+    return text[:keep] + "\n[... trimmed ...]\n" + text[-keep:]
+
+
+BASELINES = ("latest", "full_history")
+
+
+class RefinementContext:
+    """
+    Tracks the rounds of a refinement loop and builds a prompt context within `token_budget`.
+    `baseline` is what the replaced loop sent each round, for the report: "latest" (the latest
+    code and critique in full, as the goal-setting agents do) or "full_history" (every version
+    and critique, as the reflection loop's growing message history does).
+    """
+
+    def __init__(self, token_budget: int = 4000, feedback_share: float = 0.3, baseline: str = "latest",
+                 min_feedback_tokens: int = 500):
+        if baseline not in BASELINES:
+            raise ValueError(f"baseline must be one of {BASELINES}, got {baseline!r}")
+        self.token_budget = token_budget
+        self.feedback_share = feedback_share
+        self.min_feedback_tokens = min_feedback_tokens
+        self.baseline = baseline
+        self.rounds = []  # [(code, feedback)]
+        self.sent_tokens = 0
+        self.baseline_tokens = 0
+
+    def add_round(self, code: str, feedback: str = ""):
+        self.rounds.append((code, feedback or ""))
+
+    @property
+    def latest_code(self) -> str:
+        return self.rounds[-1][0] if self.rounds else ""
+
+    @property
+    def latest_feedback(self) -> str:
+        return self.rounds[-1][1] if self.rounds else ""
+
+    def history(self, max_tokens: int) -> str:
+        """Unified diffs between consecutive versions, newest first, until `max_tokens` is used."""
+        sections, used = [], 0
+        for i in range(len(self.rounds) - 1, 0, -1):
+            before, feedback = self.rounds[i - 1]
+            after = self.rounds[i][0]
+            diff = "\n".join(difflib.unified_diff(
+                before.splitlines(), after.splitlines(),
+                f"round_{i}.py", f"round_{i + 1}.py", lineterm="", n=1,
+            ))
+            if not diff:
+                continue  # the same version was refined twice
+            section = f"Round {i} -> {i + 1} (critique: {summarize_feedback(feedback)}):\n{diff}"
+            cost = count_tokens(section)
+            if used + cost > max_tokens:
+                break
+            sections.append(section)
+            used += cost
+        return "\n\n".join(sections)
+
+    def build(self) -> tuple[str, str, str]:
+        """
+        Returns (latest_code, latest_feedback, history) to put in the next prompt:
+        the latest code in full, its critique trimmed to its share of the budget (but never
+        below `min_feedback_tokens`), and as many earlier-round diffs as fit in what is left.
+        """
+        code = self.latest_code
+        remaining = max(0, self.token_budget - count_tokens(code))
+        feedback = trim_to_tokens(self.latest_feedback, max(self.min_feedback_tokens, int(remaining * self.feedback_share)))
+        history_budget = remaining - count_tokens(feedback)
+        # Never send more than the loop being replaced: history only uses the tokens it would have
+        # spent on the full critique and (with the full-history baseline) the earlier rounds
+        replaced = count_tokens(self.latest_feedback) - count_tokens(feedback)
+        if self.baseline == "full_history":
+            replaced += sum(count_tokens(c) + count_tokens(f) for c, f in self.rounds[:-1])
+        history_budget = min(history_budget, replaced)
+        history = self.history(history_budget)
+
+        self.sent_tokens += count_tokens(code) + count_tokens(feedback) + count_tokens(history)
+        # What the replaced loop would have sent for the same round
+        if self.baseline == "full_history":
+            self.baseline_tokens += sum(count_tokens(c) + count_tokens(f) for c, f in self.rounds)
+        else:
+            self.baseline_tokens += count_tokens(code) + count_tokens(self.latest_feedback)
+        return code, feedback, history
+
+    def to_messages(self, task_prompt: str, instruction: str = "Please refine the code using the critiques provided."):
+        """Bounded replacement for an ever-growing `message_history` in reflection loops."""
+        if not self.rounds:
+            return [HumanMessage(content=task_prompt)]
+        code, feedback, history = self.build()
+        messages = [HumanMessage(content=task_prompt), AIMessage(content=code)]
+        if history:
+            messages.append(HumanMessage(content=f"Changes made in earlier rounds:\n{history}"))
+        messages.append(HumanMessage(content=f"Critique of the previous code:\n{feedback}\n\n{instruction}"))
+        return messages
+
+    @property
+    def saved_tokens(self) -> int:
+        """Baseline minus sent tokens."""
+        return self.baseline_tokens - self.sent_tokens
+
+    def report(self) -> str:
+        saved = self.saved_tokens
+        outcome = f"{saved} saved" if saved >= 0 else f"{-saved} more"
+        return (
+            f"Context: {len(self.rounds)} rounds, {self.sent_tokens} prompt tokens sent, "
+            f"{self.baseline_tokens} with the {self.baseline.replace('_', ' ')} baseline, {outcome}"
+        )
+
+
+REFLECTOR_PROMPT = """
+You are a senior software engineer and an expert in Python.
+Your role is to perform a meticulous code review.
+Critically evaluate the provided Python code based on the original task requirements.
+Look for bugs, style issues, missing edge cases, and areas for improvement.
+If the code is perfect and meets all requirements,
+respond with the single phrase 'CODE_IS_PERFECT'.
+Otherwise, provide a bulleted list of your critiques.
+"""
+
+
+def run_reflection_loop(llm, task_prompt: str, max_iterations: int = 3, token_budget: int = 4000) -> str:
+    """
+    The reflection loop from AI_agent_basic.ipynb with a bounded context instead of
+    appending every version and critique to `message_history`.
+    """
+    context = RefinementContext(token_budget, baseline="full_history")
+    current_code = ""
+    for i in range(max_iterations):
+        print("\n" + "=" * 25 + f" REFLECTION LOOP: ITERATION {i + 1} " + "=" * 25)
+        response = llm.invoke(context.to_messages(task_prompt))
+        current_code = response.content
+        print("\n--- Generated Code (v" + str(i + 1) + ") ---\n" + current_code)
+
+        critique = llm.invoke([
+            SystemMessage(content=REFLECTOR_PROMPT),
+            HumanMessage(content=f"Original Task:\n{task_prompt}\n\nCode to Review:\n{current_code}"),
+        ]).content
+        if "CODE_IS_PERFECT" in critique:
+            print("\n--- Critique ---\nNo further critiques found. The code is satisfactory.")
+            break
+        print("\n--- Critique ---\n" + critique)
+        context.add_round(current_code, critique)
+
+    print("\n" + context.report())
+    return current_code
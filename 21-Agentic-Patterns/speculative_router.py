@@ -0,0 +1,93 @@
+"""
+Speculative search for the resource-aware router (16_Resource_Aware_Opt_LLM_Reflection_v1.py).
+
+The sequential flow is classify -> search -> generate, so a search-bound prompt pays for the
+classifier and the search one after the other. `route` starts the search at the same time as
+classification when a cheap keyword heuristic says it will probably be needed, and simply drops
+the result if the classifier decides otherwise.
+"""
+
+import asyncio
+import threading
+import time
+
+SEARCH_WORDS = ["latest", "current", "today", "search", "find", "news"]
+
+
+def needs_search(prompt: str) -> bool:
+    # Heuristic: asks for latest, current, or "search"/"find"
+    return any(w in prompt.lower() for w in SEARCH_WORDS)
+
+
+def is_search_classification(classification: str) -> bool:
+    return "google" in classification.lower()
+
+
+def _set_result(future: asyncio.Future, result, error):
+    if future.done():  # cancelled: the speculation was dropped
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+def start_speculative(func, *args) -> asyncio.Future:
+    """
+    Runs `func(*args)` in a daemon thread and returns a future for its result.
+    Unlike asyncio.to_thread, a dropped speculation does not hold up asyncio.run's executor
+    shutdown or interpreter exit while it finishes.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def run():
+        try:
+            result, error = func(*args), None
+        except Exception as e:
+            result, error = None, e
+        try:
+            loop.call_soon_threadsafe(_set_result, future, result, error)
+        except RuntimeError:
+            pass  # the event loop is already closed; nobody is waiting
+
+    threading.Thread(target=run, daemon=True, name="speculative-search").start()
+    return future
+
+
+async def route(prompt: str, classify, search, generate, speculate=needs_search) -> dict:
+    """
+    classify(prompt) -> (classification, reasoning, source), search(prompt) -> [snippets] and
+    generate(prompt, classification, results) are blocking callables run in worker threads.
+    Returns the classification, response and timings; `speculative` tells whether the
+    search was started early and `search_used` whether its result was kept.
+    """
+    started = time.perf_counter()
+    search_task = start_speculative(search, prompt) if speculate(prompt) else None
+
+    classification, reasoning, source = await asyncio.to_thread(classify, prompt)
+    classified_at = time.perf_counter()
+
+    results = None
+    if is_search_classification(classification):
+        results = await (search_task or asyncio.to_thread(search, prompt))
+    elif search_task is not None:
+        # Wasted speculation: the daemon thread finishes in the background, its result is ignored
+        search_task.cancel()
+    searched_at = time.perf_counter()
+
+    response = await asyncio.to_thread(generate, prompt, classification, results)
+    return {
+        "classification": classification,
+        "reasoning": reasoning,
+        "classified_by": source,
+        "response": response,
+        "speculative": search_task is not None,
+        "search_used": results is not None,
+        "timings": {
+            "classify_s": classified_at - started,
+            "search_wait_s": searched_at - classified_at,
+            "total_s": time.perf_counter() - started,
+        },
+    }
+
@@ -0,0 +1,187 @@
+# This Python program implements the following use case:
+# Count the number of words and characters in .docx files, one file or whole directories of them, and print per-file and total counts
+#
+# Same counts as wordcount_1102.py (the text python-docx gives for the body paragraphs, joined
+# with spaces), but:
+# - word/document.xml is decompressed and parsed incrementally with iterparse straight from the zip;
+#   each paragraph is counted and discarded as soon as it ends, so no object model or
+#   whole-document string is built and memory stays flat however large the document is
+# - batch mode spreads the files of one or more directories over a process pool
+#
+# Usage:
+#   python wordcount_streaming.py report.docx
+#   python wordcount_streaming.py docs/ more_docs/ --workers 8
+#   python wordcount_streaming.py docs/ --compare      # also time wordcount_1102.py and check the counts
+
+import argparse
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree.ElementTree import iterparse
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+BODY, P, R, HYPERLINK = W + "body", W + "p", W + "r", W + "hyperlink"
+# Run children and their text, as python-docx's Run.text renders them (w:br depends on its type)
+RUN_TEXT = {W + "tab": "\t", W + "ptab": "\t", W + "cr": "\n", W + "noBreakHyphen": "-"}
+T, BR, BR_TYPE = W + "t", W + "br", W + "type"
+OFFICE_DOCUMENT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+
+
+def _document_part(zf):
+    """Name of the main document part: word/document.xml, or wherever _rels/.rels points."""
+    if "word/document.xml" in zf.namelist():
+        return "word/document.xml"
+    with zf.open("_rels/.rels") as f:
+        for _, rel in iterparse(f):
+            if rel.get("Type") == OFFICE_DOCUMENT:
+                target = rel.get("Target")
+                if not target:
+                    raise KeyError("main document relationship has no target")
+                return target.lstrip("/")
+    raise KeyError("no main document part")
+
+
+def count_stream(xml_file):
+    """
+    (words, characters) of the body paragraphs in a document.xml stream. Only paragraphs directly
+    in the body count, and within them only runs directly in the paragraph or in a hyperlink,
+    matching python-docx's Document.paragraphs and Paragraph.text.
+    """
+    words = characters = paragraphs = 0
+    stack = []  # tags of the open elements
+    pieces = []  # text of the current body paragraph
+    body = None
+    for event, elem in iterparse(xml_file, events=("start", "end")):
+        if event == "start":
+            stack.append(elem.tag)
+            if elem.tag == BODY:
+                body = elem
+            continue
+        stack.pop()
+        tag = elem.tag
+        # stack[-1] is now the parent: ... body, p, [hyperlink,] r
+        if len(stack) >= 4 and stack[-1] == R and (
+            stack[-2] == P and stack[-3] == BODY or stack[-2] == HYPERLINK and stack[-3] == P and stack[-4] == BODY
+        ):
+            if tag == T:
+                pieces.append(elem.text or "")
+            elif tag in RUN_TEXT:
+                pieces.append(RUN_TEXT[tag])
+            elif tag == BR and elem.get(BR_TYPE, "textWrapping") == "textWrapping":
+                pieces.append("\n")
+        elif stack and stack[-1] == BODY:
+            if tag == P:
+                text = "".join(pieces)
+                pieces.clear()
+                words += len(text.split())
+                characters += len(text)
+                paragraphs += 1
+            # Drop every finished body child (paragraph, table, ...) so the tree never grows
+            body.remove(elem)
+    # wordcount_1102.py joins the paragraphs with single spaces
+    return words, characters + max(paragraphs - 1, 0)
+
+
+def count_file(file_path):
+    """Per-file result for batch mode: {'file', 'words', 'characters'} or {'file', 'error'}."""
+    try:
+        with zipfile.ZipFile(file_path) as zf, zf.open(_document_part(zf)) as xml_file:
+            words, characters = count_stream(xml_file)
+        return {"file": file_path, "words": words, "characters": characters}
+    except FileNotFoundError:
+        return {"file": file_path, "error": f"Error: The file '{file_path}' was not found."}
+    except (zipfile.BadZipFile, KeyError):
+        return {"file": file_path, "error": f"Error: The file '{file_path}' is not a valid .docx file."}
+    except Exception as e:
+        # Like wordcount_1102.py: one malformed file must not abort the whole batch
+        return {"file": file_path, "error": f"Error processing file: {e}"}
+
+
+def count_words_and_characters(file_path):
+    # Drop-in for wordcount_1102.count_words_and_characters
+    result = count_file(file_path)
+    if "error" in result:
+        print(result["error"])
+        return None, None
+    return result["words"], result["characters"]
+
+
+def find_docx(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                # Skip Word's "~$name.docx" lock files
+                files.extend(os.path.join(root, n) for n in sorted(names) if n.lower().endswith(".docx") and not n.startswith("~$"))
+        else:
+            files.append(path)
+    return files
+
+
+def count_batch(files, workers=None):
+    """Yields per-file results in input order, counting across a process pool."""
+    if workers == 1 or len(files) < 2:
+        yield from map(count_file, files)
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(count_file, files, chunksize=max(1, min(32, len(files) // (workers * 4))))
+
+
+def compare_with_python_docx(files, results, seconds):
+    from wordcount_1102 import count_words_and_characters as docx_count
+
+    started = time.perf_counter()
+    mismatches = 0
+    for result in results:
+        if "error" in result:
+            continue
+        if docx_count(result["file"]) != (result["words"], result["characters"]):
+            mismatches += 1
+            print(f"Count differs from python-docx: {result['file']}")
+    docx_seconds = time.perf_counter() - started
+    print(f"python-docx (serial): {len(files) / docx_seconds:,.1f} files/s; "
+          f"streaming: {len(files) / seconds:,.1f} files/s, speedup {docx_seconds / seconds:.1f}x; {mismatches} mismatches")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming word/character counts for .docx files and directories")
+    parser.add_argument("paths", nargs="+", help=".docx files or directories (searched recursively)")
+    parser.add_argument("--workers", type=int, default=None, help="processes for batch mode (default: CPU count)")
+    parser.add_argument("--compare", action="store_true", help="also count with wordcount_1102.py (python-docx) and compare")
+    args = parser.parse_args()
+
+    # One file: same output as wordcount_1102.py
+    if len(args.paths) == 1 and not os.path.isdir(args.paths[0]) and not args.compare:
+        word_count, char_count = count_words_and_characters(args.paths[0])
+        if word_count is None:
+            sys.exit(1)
+        print(f"Word Count: {word_count}")
+        print(f"Character Count: {char_count}")
+        return
+
+    files = find_docx(args.paths)
+    started = time.perf_counter()
+    results = []
+    total_words = total_chars = failed = 0
+    print(f"{'words':>10} {'characters':>12}  file")
+    for result in count_batch(files, args.workers):
+        results.append(result)
+        if "error" in result:
+            failed += 1
+            print(f"{'-':>10} {'-':>12}  {result['file']}: {result['error']}")
+            continue
+        total_words += result["words"]
+        total_chars += result["characters"]
+        print(f"{result['words']:>10} {result['characters']:>12}  {result['file']}")
+    seconds = time.perf_counter() - started
+    print(f"{total_words:>10} {total_chars:>12}  total ({len(files) - failed} files, {failed} failed)")
+    print(f"{len(files)} files in {seconds:.2f}s ({len(files) / seconds if seconds else 0:,.1f} files/s)")
+    if args.compare and files:
+        compare_with_python_docx(files, results, seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,142 @@
 import pandas as pd
 import os
 from dotenv import load_dotenv
-from tools.metadata_extractor import describe_image_with_langchain, tagging_image_with_langchain
+from tools.metadata_extractor import PACKABLE_TYPES, describe_image_with_langchain, tagging_image_with_langchain, tagging_images_packed
+from tools.image_store import ImageBlobStore
+from tools.text_tagger import derive_tags_from_description
+from tools.deadlines import CancellationToken, Cancelled, Deadline, DeadlineExceeded
+import signal
+import sys
 import time
 
 load_dotenv()
 
+# Project tokens, cost and duration without calling the LLM
+if "--dry-run" in sys.argv:
+    from tools.cost_estimator import main as estimate_job
+    # The estimator parses the same flags (--resume estimates only the unfinished items)
+    estimate_job(sys.argv[1:])
+    sys.exit(0)
+
 from langchain_openai import ChatOpenAI
 llm = ChatOpenAI(model="gpt-4o-mini")
 
-df = pd.read_csv("data.csv")
-# Initialize columns
-df["description"] = ""
-df["tags"] = ""
+OUTPUT_CSV = "data_tagged.csv"
+JOB_DEADLINE_S = float(os.getenv("JOB_DEADLINE_S", 24 * 3600))  # Whole run
+ITEM_DEADLINE_S = 300  # Both calls and retries of one item
+REQUEST_TIMEOUT_S = 90  # One LLM call
+# Simple products are tagged PACK_SIZE images per request (1 disables packing)
+PACK_SIZE = int(os.getenv("PACK_SIZE", 4))
+# TAG_MODE=text derives tags from the description (keyword rules, then a text-only model)
+# and only sends the image again for low-confidence items
+TAG_MODE = os.getenv("TAG_MODE", "image")
+text_llm = ChatOpenAI(model=os.getenv("TEXT_TAG_MODEL", "gpt-4o-mini")) if TAG_MODE == "text" else None
+
+# Resume from the last checkpoint with --resume, otherwise start over
+if "--resume" in sys.argv and os.path.exists(OUTPUT_CSV):
+    df = pd.read_csv(OUTPUT_CSV, index_col=0).fillna("")
+else:
+    df = pd.read_csv("data.csv")
+    # Initialize columns
+    df["description"] = ""
+    df["tags"] = ""
+# Images are downloaded once into the local blob store and sent as data URLs
+image_store = ImageBlobStore("image_cache", max_bytes=5 * 1024**3)
+
+token = CancellationToken()
+job_deadline = Deadline(JOB_DEADLINE_S, token=token)
+
+def handle_sigint(signum, frame):
+    # First Ctrl-C drains: the item in flight finishes, then we checkpoint and stop.
+    # It also wakes any rate-limit or retry wait. Second Ctrl-C cancels the item in flight.
+    if token.stop_requested:
+        token.cancel("interrupted")
+    else:
+        token.request_stop()
+        print("Stopping after the current item, press Ctrl-C again to cancel it...")
+
+signal.signal(signal.SIGINT, handle_sigint)
 
 max_num_try = 3
 num_items = len(df)
+packable = [j for j in range(num_items) if df.at[j, "Product Type"] in PACKABLE_TYPES]
+
+def pack_tags(i):
+    """Tags item i together with the next untagged packable items, in one request."""
+    pending = [j for j in packable if j >= i and not df.at[j, "tags"]][:PACK_SIZE]
+    try:
+        tags = tagging_images_packed(
+            llm, [df["MK"][j] for j in pending], local_img=False, image_store=image_store,
+            pack_size=PACK_SIZE, deadline=job_deadline.child(ITEM_DEADLINE_S),
+            request_timeout=REQUEST_TIMEOUT_S
+        )
+    except Cancelled:
+        raise
+    except Exception as e:
+        print(f"Packed tagging failed for items {pending}: {e}")
+        return
+    for j, item_tags in zip(pending, tags):
+        if item_tags is not None:  # failed items are retried by the per-item loop
+            df.at[j, "tags"] = item_tags
+
+try:
+    for i in range(num_items):
+        if token.stop_requested or job_deadline.expired:
+            print(f"Stopping before item {i}.")
+            break
+        if df.at[i, "description"] and df.at[i, "tags"]:
+            continue  # Done in a previous run
+        print(i)
+        if TAG_MODE == "image" and PACK_SIZE > 1 and not df.at[i, "tags"] and df.at[i, "Product Type"] in PACKABLE_TYPES:
+            try:
+                pack_tags(i)
+            except Cancelled:
+                print(f"Item {i} cancelled.")
+                break
+        item_deadline = job_deadline.child(ITEM_DEADLINE_S)
+        for attempt in range(max_num_try):
+            try:
+                description = describe_image_with_langchain(
+                    llm, df["MK"][i], local_img=False, image_store=image_store,
+                    deadline=item_deadline, request_timeout=REQUEST_TIMEOUT_S
+                )
+                # Tags may already come from a packed request or from the description
+                if not df.at[i, "tags"] and TAG_MODE == "text":
+                    df.at[i, "tags"] = derive_tags_from_description(
+                        description, df.at[i, "Product Type"], text_llm,
+                        deadline=item_deadline, request_timeout=REQUEST_TIMEOUT_S
+                    ) or ""
+                tags = df.at[i, "tags"] or tagging_image_with_langchain(
+                    llm, df["MK"][i], local_img=False, image_store=image_store,
+                    deadline=item_deadline, request_timeout=REQUEST_TIMEOUT_S
+                )
+
+                # Save results to dataframe
+                df.at[i, "description"] = description
+                df.at[i, "tags"] = tags
+                break
+            except Cancelled:
+                print(f"Item {i} cancelled.")
+                break
+            except Exception as e:
+                print(f"Attempt {attempt + 1} failed for item {i}: {e}")
+                if attempt == max_num_try - 1 or item_deadline.expired:
+                    print(f"Skipping item {i} after {attempt + 1} tries.")
+                    break
+                try:
+                    item_deadline.sleep(60)  # Wait before retrying
+                except (Cancelled, DeadlineExceeded):
+                    print(f"Skipping item {i}: deadline reached or cancelled.")
+                    break
+                if token.stop_requested:
+                    print(f"Skipping item {i}: stopping.")
+                    break
 
-for i in range(num_items):
-    print(i)
-    for attempt in range(max_num_try):
-        try:
-            description = describe_image_with_langchain(
-                llm, df["MK"][i], local_img=False
-            )
-            tags = tagging_image_with_langchain(
-                llm, df["MK"][i], local_img=False
-            )
-
-            # Save results to dataframe
-            df.at[i, "description"] = description
-            df.at[i, "tags"] = tags
-            break 
-        except Exception as e:
-            print(f"Attempt {attempt + 1} failed for item {i}: {e}")
-            time.sleep(60)  # Wait before retrying
-            if attempt == max_num_try - 1:
-                print(f"Skipping item {i} after {max_num_try} tries.")
-            
-
-    # Save the updated dataframe to a new CSV file
-    if i % 10 == 0:  # Save every 10 items
-        df.to_csv("data_tagged.csv")
-        time.sleep(60)  # To avoid hitting rate limits
-
-df.to_csv("data_tagged.csv")
\ No newline at end of file
+        # Save the updated dataframe to a new CSV file
+        if i % 10 == 0:  # Save every 10 items
+            df.to_csv(OUTPUT_CSV)
+            token.wait(60)  # To avoid hitting rate limits
+finally:
+    # Checkpoint whatever finished, also on deadline or Ctrl-C
+    df.to_csv(OUTPUT_CSV)
+    image_store.close()  # persists the LRU access times
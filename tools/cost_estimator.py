@@ -0,0 +1,290 @@
+"""
+Dry-run token, cost and duration estimator for catalog tagging jobs.
+
+Image tokens are computed from image dimensions (read from the local blob store or
+from the first bytes of the file with an HTTP range request), prompt tokens from the
+templates used by `tools.metadata_extractor` and `tools.text_tagger`. Duration follows
+main.py's loop: sequential requests plus its checkpoint pauses. Nothing is sent to the LLM.
+
+Usage:
+    python -m tools.cost_estimator data.csv --model gpt-4o-mini --rpm 500 --pack-size 4
+    python main.py --dry-run --resume
+"""
+
+import argparse
+import io
+import math
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import requests
+from PIL import Image
+
+from tools.metadata_extractor import DESCRIBE_PROMPT, PACKABLE_TYPES, PACKED_TAGGING_PROMPT, TAGGING_PROMPT
+from tools.text_tagger import DESCRIPTION_TAGGING_PROMPT
+
+try:
+    import tiktoken
+except ImportError:  # fall back to the ~4 characters per token rule of thumb
+    tiktoken = None
+
+# (base tokens, tokens per 512px tile) for image inputs
+IMAGE_TOKEN_RATES = {
+    "gpt-4o": (85, 170),
+    "gpt-4o-mini": (2833, 5667),
+    "gpt-4.1": (85, 170),
+}
+
+# USD per 1M tokens: (input, output)
+PRICING = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+
+# Tokens added by the chat format around each message
+MESSAGE_OVERHEAD_TOKENS = 7
+
+HEADER_BYTES = 64 * 1024
+
+# main.py's checkpoint file, read by --resume
+OUTPUT_CSV = "data_tagged.csv"
+
+
+def count_text_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    if tiktoken is None:
+        return max(1, math.ceil(len(text) / 4))
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+    except Exception:  # the encoding file is downloaded on first use and may be unreachable
+        return max(1, math.ceil(len(text) / 4))
+    return len(encoding.encode(text))
+
+
+def image_tokens(width: int, height: int, detail: str = "auto", model: str = "gpt-4o-mini") -> int:
+    """
+    Tokens billed for one image input.
+    `low` detail is a flat base cost; `high`/`auto` scale the image to fit 2048x2048,
+    then the short side to 768px, and bill per 512px tile.
+    """
+    base, per_tile = IMAGE_TOKEN_RATES.get(model, IMAGE_TOKEN_RATES["gpt-4o"])
+    if detail == "low" or width <= 0 or height <= 0:
+        return base
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return base + per_tile * tiles
+
+
+def _header_size(data: bytes):
+    width, height = Image.open(io.BytesIO(data)).size
+    return (width, height) if width > 0 and height > 0 else None
+
+
+def _read_header(url: str, n_bytes: int, timeout: float) -> bytes:
+    # Streamed, so a server that ignores the Range header still only sends what is read
+    with requests.get(url, headers={"Range": f"bytes=0-{n_bytes - 1}"}, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        return response.raw.read(n_bytes, decode_content=True)
+
+
+def image_size(url: str, image_store=None, timeout: float = 10):
+    """Returns (width, height) reading only the image header; None if it cannot be read."""
+    if image_store is not None and url in image_store:
+        try:
+            with image_store.open(url) as mm:
+                return _header_size(mm[:HEADER_BYTES])
+        except (OSError, ValueError):
+            return None
+    n_bytes = HEADER_BYTES
+    for _ in range(3):
+        try:
+            data = _read_header(url, n_bytes, timeout)
+        except (requests.RequestException, OSError):
+            return None
+        try:
+            return _header_size(data)
+        except OSError:
+            if len(data) < n_bytes:
+                return None  # the whole file was read and is not an image
+            n_bytes *= 4  # header not complete yet (e.g. large EXIF block), read further
+    return None
+
+
+@dataclass
+class JobEstimate:
+    items: int
+    requests: int
+    input_tokens: int
+    output_tokens: int
+    cost_usd: float
+    wall_clock_s: float
+    unreadable_images: int
+    checkpoint_wait_s: float = 0.0
+
+
+def estimate_job(
+    urls,
+    model: str = "gpt-4o-mini",
+    detail: str = "auto",
+    item: str = "quilt",
+    detail_level: str = "very detailed",
+    describe_output_tokens: int = 250,
+    tagging_output_tokens: int = 200,
+    rpm: float = 500,
+    latency_s: float = 6.0,
+    sample: int = None,
+    image_store=None,
+    workers: int = 16,
+    product_types=None,
+    pack_size: int = 1,
+    packable_types=PACKABLE_TYPES,
+    tag_mode: str = "image",
+    text_fallback_rate: float = 0.2,
+    rows=None,
+    checkpoint_every: int = 10,
+    checkpoint_wait_s: float = 60,
+) -> JobEstimate:
+    """
+    Projects tokens, cost and duration of main.py's loop over `urls`: one item at a time, a describe
+    call for each, then tags from a packed request (packable `product_types`, `pack_size` > 1), from
+    the description (`tag_mode="text"`, with `text_fallback_rate` of the items re-tagged from the
+    image) or from a tagging call. main.py pauses `checkpoint_wait_s` after each row of `rows` (the
+    items' row numbers, default 0..n-1) that is a multiple of `checkpoint_every`.
+    With `sample`, only that many images are probed and the average is extrapolated.
+    """
+    urls = list(urls)
+    n = len(urls)
+    product_types = list(product_types) if product_types is not None else [""] * n
+    rows = list(rows) if rows is not None else list(range(n))
+    probe = urls if not sample else urls[:: max(1, n // sample)][:sample]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        sizes = list(pool.map(lambda u: image_size(u, image_store), probe))
+
+    known = [image_tokens(w, h, detail, model) for w, h in (s for s in sizes if s)]
+    # Unreadable images are counted at the average of the readable ones
+    avg_image = sum(known) / len(known) if known else image_tokens(2048, 2048, detail, model)
+
+    describe_prompt = count_text_tokens(DESCRIBE_PROMPT.format(item=item, detail_level=detail_level), model) + MESSAGE_OVERHEAD_TOKENS
+    tagging_prompt = count_text_tokens(TAGGING_PROMPT, model) + MESSAGE_OVERHEAD_TOKENS
+    # Every item is described from its image
+    n_requests = n
+    input_tokens = n * (avg_image + describe_prompt)
+    output_tokens = n * describe_output_tokens
+
+    if tag_mode == "text":
+        # Tags come from the description; at worst every item needs the text model
+        text_prompt = count_text_tokens(DESCRIPTION_TAGGING_PROMPT.format(description=""), model) + MESSAGE_OVERHEAD_TOKENS
+        n_requests += n
+        input_tokens += n * (text_prompt + describe_output_tokens)
+        output_tokens += n * tagging_output_tokens
+        image_tagged = math.ceil(n * text_fallback_rate)
+    else:
+        packed = sum(1 for t in product_types if t in packable_types) if pack_size > 1 else 0
+        if packed:
+            packs = math.ceil(packed / pack_size)
+            packed_prompt = count_text_tokens(PACKED_TAGGING_PROMPT.format(count=pack_size, first_id="img_0"), model)
+            n_requests += packs
+            # Each image is still billed in full, plus its "img_N" label
+            input_tokens += packs * (packed_prompt + MESSAGE_OVERHEAD_TOKENS) + packed * (avg_image + 4)
+            output_tokens += packed * tagging_output_tokens
+        image_tagged = n - packed
+    n_requests += image_tagged
+    input_tokens += image_tagged * (avg_image + tagging_prompt)
+    output_tokens += image_tagged * tagging_output_tokens
+
+    input_tokens = int(input_tokens)
+    price_in, price_out = PRICING.get(model, PRICING["gpt-4o-mini"])
+    cost = input_tokens / 1e6 * price_in + output_tokens / 1e6 * price_out
+
+    # Requests are sent one after another, never faster than the rate limit allows
+    seconds_per_request = max(latency_s, 60 / rpm if rpm else 0)
+    waits = sum(1 for row in rows if row % checkpoint_every == 0) * checkpoint_wait_s
+
+    return JobEstimate(
+        items=n,
+        requests=n_requests,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cost_usd=cost,
+        wall_clock_s=n_requests * seconds_per_request + waits,
+        unreadable_images=len(probe) - len(known),
+        checkpoint_wait_s=waits,
+    )
+
+
+def format_report(estimate: JobEstimate) -> str:
+    hours, rest = divmod(int(estimate.wall_clock_s), 3600)
+    return "\n".join([
+        "=== Dry run estimate ===",
+        f"Items:             {estimate.items}",
+        f"Requests:          {estimate.requests}",
+        f"Input tokens:      {estimate.input_tokens:,}",
+        f"Output tokens:     {estimate.output_tokens:,}",
+        f"Estimated cost:    ${estimate.cost_usd:,.2f}",
+        f"Wall-clock time:   {hours}h {rest // 60}m {rest % 60}s (incl. {estimate.checkpoint_wait_s / 3600:.1f}h checkpoint pauses)",
+        f"Unreadable images: {estimate.unreadable_images}",
+    ])
+
+
+def main(argv=None):
+    import os
+
+    import pandas as pd
+
+    from tools.image_store import ImageBlobStore
+
+    parser = argparse.ArgumentParser(description="Estimate tokens, cost and duration of a tagging job.")
+    parser.add_argument("csv", nargs="?", default="data.csv")
+    parser.add_argument("--column", default="MK")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--detail", default="auto", choices=["low", "high", "auto"])
+    parser.add_argument("--rpm", type=float, default=500, help="requests per minute allowed")
+    parser.add_argument("--latency", type=float, default=6.0, help="average seconds per request")
+    parser.add_argument("--sample", type=int, default=200, help="images to probe (0 = all)")
+    parser.add_argument("--pack-size", type=int, default=int(os.getenv("PACK_SIZE", 4)))
+    parser.add_argument("--tag-mode", default=os.getenv("TAG_MODE", "image"), choices=["image", "text"])
+    parser.add_argument("--text-fallback", type=float, default=0.2, help="share of text-tagged items re-tagged from the image")
+    parser.add_argument("--image-cache", default="image_cache", help="blob store read for image sizes, if it exists")
+    # main.py's own flags, so `python main.py --dry-run --resume` is parsed as one command line
+    parser.add_argument("--dry-run", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--resume", action="store_true", help=f"only estimate the items not finished in {OUTPUT_CSV}")
+    args = parser.parse_args(argv)
+
+    if args.resume and os.path.exists(OUTPUT_CSV):
+        # Same checkpoint main.py resumes from; finished items are skipped
+        df = pd.read_csv(OUTPUT_CSV, index_col=0).fillna("")
+        df = df[(df["description"] == "") | (df["tags"] == "")]
+    else:
+        df = pd.read_csv(args.csv)
+    df = df[df[args.column].notna() & (df[args.column] != "")]
+    image_store = ImageBlobStore(args.image_cache) if os.path.isdir(args.image_cache) else None
+    try:
+        estimate = estimate_job(
+            df[args.column].tolist(),
+            model=args.model,
+            detail=args.detail,
+            rpm=args.rpm,
+            latency_s=args.latency,
+            sample=args.sample or None,
+            image_store=image_store,
+            product_types=df["Product Type"].tolist() if "Product Type" in df else None,
+            pack_size=args.pack_size,
+            tag_mode=args.tag_mode,
+            text_fallback_rate=args.text_fallback,
+            rows=df.index.tolist(),
+        )
+    finally:
+        if image_store is not None:
+            image_store.close()
+    print(format_report(estimate))
+    return estimate
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call, item or job runs past its deadline."""
+
+
+class Cancelled(Exception):
+    """Raised when work is stopped through a CancellationToken."""
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation flag shared by the job, its items and their LLM calls.
+    `request_stop()` is the gentler signal: nothing is cancelled, but every wait returns early
+    so the job can finish the item in flight and stop.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._wake = threading.Event()  # set by cancel() and request_stop(); ends every wait
+        self._stop_requested = False
+        self.reason = ""
+
+    def cancel(self, reason: str = "cancelled"):
+        self.reason = reason
+        self._event.set()
+        self._wake.set()
+
+    def request_stop(self):
+        self._stop_requested = True
+        self._wake.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def stop_requested(self) -> bool:
+        return self._stop_requested or self.cancelled
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise Cancelled(self.reason)
+
+    def wait(self, seconds: float) -> bool:
+        """Sleeps up to `seconds`; returns True early if cancelled or a stop was requested."""
+        return self._wake.wait(max(0.0, seconds))
+
+
+class Deadline:
+    """
+    Absolute point in time a unit of work must finish by.
+    Children (job -> item -> request) never outlive their parent and share its token.
+    """
+
+    def __init__(self, seconds: float = None, token: CancellationToken = None, parent: "Deadline" = None):
+        expires = time.monotonic() + seconds if seconds is not None else None
+        if parent is not None and parent.expires_at is not None:
+            expires = parent.expires_at if expires is None else min(expires, parent.expires_at)
+        self.expires_at = expires
+        self.token = token or (parent.token if parent is not None else CancellationToken())
+
+    def child(self, seconds: float = None) -> "Deadline":
+        return Deadline(seconds, parent=self)
+
+    def remaining(self) -> float:
+        """Seconds left, or None for no deadline."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def check(self):
+        self.token.raise_if_cancelled()
+        if self.expired:
+            raise DeadlineExceeded("deadline exceeded")
+
+    def timeout(self, request_timeout: float = None) -> float:
+        """Timeout for the next request: the smaller of `request_timeout` and the time left."""
+        remaining = self.remaining()
+        if remaining is None:
+            return request_timeout
+        return remaining if request_timeout is None else min(request_timeout, remaining)
+
+    def sleep(self, seconds: float):
+        """Sleeps without outliving the deadline; wakes up immediately on cancellation or a stop request."""
+        remaining = self.remaining()
+        if remaining is not None:
+            seconds = min(seconds, remaining)
+        self.token.wait(seconds)
+        self.check()
+
+
+# LLM calls run here so the caller can stop waiting on a stuck socket or on cancellation
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-call")
+
+POLL_INTERVAL = 0.25
+
+
+def invoke_with_deadline(llm, messages, deadline: Deadline = None, request_timeout: float = None):
+    """
+    Calls `llm.invoke(messages)` bounded by `request_timeout` and the deadline.
+    The timeout is also passed to the provider so the underlying HTTP request is closed.
+    """
+    if deadline is None and request_timeout is None:
+        return llm.invoke(messages)
+    deadline = deadline or Deadline()
+    deadline.check()
+    timeout = deadline.timeout(request_timeout)
+    if timeout is None:
+        future = _executor.submit(llm.invoke, messages)
+    else:
+        future = _executor.submit(llm.invoke, messages, timeout=timeout)
+
+    started = time.monotonic()
+    while True:
+        try:
+            return future.result(timeout=POLL_INTERVAL)
+        except FutureTimeoutError:
+            if deadline.token.cancelled:
+                future.cancel()
+                raise Cancelled(deadline.token.reason)
+            if timeout is not None and time.monotonic() - started >= timeout:
+                future.cancel()
+                raise DeadlineExceeded(f"LLM call exceeded {timeout:.1f}s")
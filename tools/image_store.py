@@ -0,0 +1,254 @@
+import hashlib
+import mmap
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+INDEX_DB = "index.sqlite"
+# Lookups only update access times in memory; they are written every this many touched blobs
+ACCESS_FLUSH_EVERY = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (sha TEXT PRIMARY KEY, size INTEGER NOT NULL, ext TEXT NOT NULL, last_access REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS urls (key TEXT PRIMARY KEY, sha TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS urls_sha ON urls (sha);
+"""
+
+# Magic numbers of the formats found in the catalog, used when the URL has no extension
+_MAGIC = [
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpg"),
+    (b"GIF8", "gif"),
+]
+
+
+def _sniff_ext(data, url: str = "") -> str:
+    for magic, ext in _MAGIC:
+        if data[: len(magic)] == magic:
+            return ext
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    ext = os.path.splitext(urlsplit(url).path)[1].lower().lstrip(".")
+    return ext or "bin"
+
+
+def url_key(url: str) -> str:
+    """
+    Returns the cache key of an image URL: scheme, host and path plus the `?v=` version.
+    Other query parameters (sizes, tracking) do not change the stored bytes.
+    """
+    parts = urlsplit(url)
+    version = parse_qs(parts.query).get("v", [""])[0]
+    key = f"{parts.scheme}://{parts.netloc}{parts.path}"
+    return f"{key}?v={version}" if version else key
+
+
+class ImageBlobStore:
+    """
+    Local content-addressed store for downloaded catalog images.
+
+    Blobs are saved once per SHA-256 under `root/ab/cd/<sha256>` and an SQLite index maps
+    each URL key to its hash, so the same image reached through several URLs is kept once.
+    Blob writes are atomic (temp file + rename) and reads are memory-mapped.
+    When the total size exceeds `max_bytes` the least recently used blobs are evicted.
+    Access times from lookups are written in batches; call `flush()` (or `close()`) at the end of a job.
+    """
+
+    def __init__(self, root: str = "image_cache", max_bytes: int = 2 * 1024**3, timeout: float = 30):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        self._session = requests.Session()
+        os.makedirs(root, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(root, INDEX_DB), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._touched = set()  # hashes whose last_access is not yet written
+        self._urls, self._blobs = self._load_index()
+        self._total_bytes = sum(meta["size"] for meta in self._blobs.values())
+
+    # --- Index ---
+    def _load_index(self):
+        # Kept in LRU order (least recently used first), so eviction never sorts
+        blobs = OrderedDict(
+            (sha, {"size": size, "ext": ext, "last_access": last_access})
+            for sha, size, ext, last_access in self._db.execute("SELECT sha, size, ext, last_access FROM blobs ORDER BY last_access")
+        )
+        missing = [sha for sha in blobs if not os.path.exists(self._blob_path(sha))]
+        if missing:
+            with self._db:
+                self._db.executemany("DELETE FROM blobs WHERE sha = ?", [(sha,) for sha in missing])
+                self._db.executemany("DELETE FROM urls WHERE sha = ?", [(sha,) for sha in missing])
+            for sha in missing:
+                del blobs[sha]
+        urls = dict(self._db.execute("SELECT key, sha FROM urls"))
+        return urls, blobs
+
+    def flush(self):
+        """Writes the access times recorded by lookups since the last flush."""
+        with self._lock:
+            if not self._touched:
+                return
+            with self._db:
+                self._db.executemany(
+                    "UPDATE blobs SET last_access = ? WHERE sha = ?",
+                    [(self._blobs[sha]["last_access"], sha) for sha in self._touched if sha in self._blobs],
+                )
+            self._touched.clear()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._db.close()
+
+    def _atomic_write(self, path: str, data: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _blob_path(self, sha: str) -> str:
+        return os.path.join(self.root, sha[:2], sha[2:4], sha)
+
+    # --- Lookup / insert ---
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __contains__(self, url: str) -> bool:
+        return url_key(url) in self._urls
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    def lookup(self, url: str):
+        """Returns the content hash stored for `url`, or None."""
+        with self._lock:
+            sha = self._urls.get(url_key(url))
+            if sha is not None:
+                self._blobs[sha]["last_access"] = time.time()
+                self._blobs.move_to_end(sha)
+                self._touched.add(sha)
+                if len(self._touched) >= ACCESS_FLUSH_EVERY:
+                    self.flush()
+            return sha
+
+    def put(self, url: str, data: bytes) -> str:
+        """Stores `data` for `url` and returns its content hash."""
+        sha = hashlib.sha256(data).hexdigest()
+        key = url_key(url)
+        with self._lock:
+            now = time.time()
+            with self._db:
+                if sha not in self._blobs:
+                    path = self._blob_path(sha)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    self._atomic_write(path, data)
+                    self._blobs[sha] = {"size": len(data), "ext": _sniff_ext(data, url)}
+                    self._total_bytes += len(data)
+                self._blobs[sha]["last_access"] = now
+                self._blobs.move_to_end(sha)
+                self._touched.discard(sha)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO blobs (sha, size, ext, last_access) VALUES (?, ?, ?, ?)",
+                    (sha, self._blobs[sha]["size"], self._blobs[sha]["ext"], now),
+                )
+                self._db.execute("INSERT OR REPLACE INTO urls (key, sha) VALUES (?, ?)", (key, sha))
+                self._urls[key] = sha
+                self._evict(keep=sha)
+        return sha
+
+    def fetch(self, url: str) -> str:
+        """Returns the content hash for `url`, downloading it only on a cache miss."""
+        sha = self.lookup(url)
+        if sha is not None:
+            return sha
+        response = self._session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return self.put(url, response.content)
+
+    def prefetch(self, urls):
+        """Downloads every missing URL; returns the number of network fetches made."""
+        fetched = 0
+        for url in urls:
+            if url not in self:
+                self.fetch(url)
+                fetched += 1
+        return fetched
+
+    # --- Reads ---
+    def ext(self, url: str) -> str:
+        return self._blobs[self.fetch(url)]["ext"]
+
+    def path(self, url: str) -> str:
+        """Local path of the blob for `url`."""
+        return self._blob_path(self.fetch(url))
+
+    @contextmanager
+    def open(self, url: str):
+        """
+        Yields a read-only memory map of the image bytes.
+        The map supports the buffer protocol, so base64 or hashlib can consume it without a copy.
+        """
+        with open(self.path(url), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b""  # an empty file cannot be memory-mapped
+                return
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield mm
+            finally:
+                mm.close()
+
+    def read(self, url: str) -> bytes:
+        with self.open(url) as mm:
+            return mm[:]
+
+    # --- Eviction ---
+    def _evict(self, keep: str = None):
+        """Drops least recently used blobs; runs inside the caller's transaction."""
+        if self._total_bytes <= self.max_bytes:
+            return
+        # Walk from the least recently used end and stop as soon as enough space is freed
+        evicted = []
+        over = self._total_bytes - self.max_bytes
+        for sha, meta in self._blobs.items():
+            if over <= 0:
+                break
+            if sha != keep:
+                evicted.append((sha,))
+                over -= meta["size"]
+        for (sha,) in evicted:
+            self._total_bytes -= self._blobs.pop(sha)["size"]
+            self._touched.discard(sha)
+            for (key,) in self._db.execute("SELECT key FROM urls WHERE sha = ?", (sha,)):
+                self._urls.pop(key, None)
+            try:
+                os.remove(self._blob_path(sha))
+            except FileNotFoundError:
+                pass
+        self._db.executemany("DELETE FROM blobs WHERE sha = ?", evicted)
+        self._db.executemany("DELETE FROM urls WHERE sha = ?", evicted)
+
+    def evict(self):
+        """Evicts least recently used blobs until the store fits in `max_bytes`."""
+        with self._lock:
+            self.flush()
+            with self._db:
+                self._evict()
@@ -1,9 +1,38 @@
 from langchain_core.messages import HumanMessage
 
+from tools.deadlines import Cancelled, invoke_with_deadline
+
 from PIL import Image
 import os
+import io
+import re
+import json
 import base64
 
+# Prompt templates, shared with the cost estimator so dry runs count the real prompt tokens
+DESCRIBE_PROMPT = (
+    "Describe the {item} in {detail_level} for Midjourney without command, "
+    "mentioning all visible niche, objects, colors, context, vibe and actions. "
+    "Return the design only, no special character such as *, -. "
+    "Example: a stunning quilt bedding set features a vibrant tree of Life design "
+    "that blends intricate stitching and vibrant colors to evoke a sense of nature's "
+    "beauty and harmony."
+)
+TAGGING_PROMPT = (
+    "Describe this design in detailed tags, including: niche, color, vibe, product type, "
+    "design elements, theme. Return the result in raw JSON format, without code fences"
+)
+PACKED_TAGGING_PROMPT = (
+    "You are given {count} product images, each preceded by its ID. For every image, "
+    "describe the design in detailed tags, including: niche, color, vibe, product type, "
+    "design elements, theme. Return one raw JSON object keyed by image ID, without code fences, "
+    "e.g. {{\"{first_id}\": {{\"niche\": ..., \"color\": ...}}, ...}}"
+)
+# Simple products whose images can be tagged several per request
+PACKABLE_TYPES = {"Quilted Table Runner", "Quilted Placemats", "Quilted Round Mat"}
+# Fields a tag answer must mostly cover to be accepted from a packed request
+TAG_FIELDS = ["niche", "color", "vibe", "product type", "design elements", "theme"]
+
 def ensure_supported_format(image_path: str) -> str:
     """
     Ensures the image is in JPG or PNG format.
@@ -30,68 +59,152 @@ def image_to_base64(image_path: str) -> str:
         ext = "jpeg"  # correct MIME type
     return f"data:image/{ext};base64,{b64}"
 
+def blob_to_base64(image_store, image_url: str) -> str:
+    """
+    Reads a remote image through the local blob store and returns a base64-encoded data URL.
+    Only the first call for a URL touches the network; WEBP (or other formats) are converted to JPG in memory.
+    """
+    ext = image_store.ext(image_url)
+    with image_store.open(image_url) as mm:
+        if ext in ["jpg", "jpeg", "png"]:
+            b64 = base64.b64encode(mm).decode("utf-8")
+        else:
+            buffer = io.BytesIO()
+            Image.open(io.BytesIO(mm)).convert("RGB").save(buffer, "JPEG")
+            b64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
+            ext = "jpg"
+    if ext == "jpg":
+        ext = "jpeg"  # correct MIME type
+    return f"data:image/{ext};base64,{b64}"
+
+def resolve_image_url(image_path: str, local_img: bool = True, image_store=None) -> str:
+    """Returns the URL sent to the LLM: a data URL for local or cached images, the raw URL otherwise."""
+    if local_img:
+        # Ensure we have a supported format
+        safe_image_path = ensure_supported_format(image_path)
+
+        # Encode local file as base64 data URL
+        return image_to_base64(safe_image_path)
+    if image_store is not None:
+        return blob_to_base64(image_store, image_path)
+    return image_path
+
 def describe_image_with_langchain(
     llm,
     image_path: str,
     detail_level: str = "very detailed",
     item: str = "quilt",
-    local_img: bool = True
+    local_img: bool = True,
+    image_store=None,
+    deadline=None,
+    request_timeout: float = None
 ):
     """
     Describe an image using an LLM via LangChain multimodal input.
+    Pass an `ImageBlobStore` as `image_store` to send remote images from the local cache.
+    `deadline` (tools.deadlines.Deadline) and `request_timeout` bound the LLM call.
     """
 
-    if local_img:
-        # Ensure we have a supported format
-        safe_image_path = ensure_supported_format(image_path)
-
-        # Encode local file as base64 data URL
-        data_url = image_to_base64(safe_image_path)
-    else:
-        data_url = image_path
+    data_url = resolve_image_url(image_path, local_img, image_store)
 
     # Build multimodal input
     message = HumanMessage(
         content=[
             {
                 "type": "text",
-                "text": (
-                    f"Describe the {item} in {detail_level} for Midjourney without command, "
-                    f"mentioning all visible niche, objects, colors, context, vibe and actions. "
-                    f"Return the design only, no special character such as *, -. "
-                    f"Example: a stunning quilt bedding set features a vibrant tree of Life design "
-                    f"that blends intricate stitching and vibrant colors to evoke a sense of nature's "
-                    f"beauty and harmony."
-                ),
+                "text": DESCRIBE_PROMPT.format(item=item, detail_level=detail_level),
             },
             {"type": "image_url", "image_url": {"url": data_url}},
         ]
     )
 
     # Call LLM
-    response = llm.invoke([message])
+    response = invoke_with_deadline(llm, [message], deadline, request_timeout)
     return response.content
 
-def tagging_image_with_langchain(llm, image_path: str, local_img = True):
+def tagging_image_with_langchain(llm, image_path: str, local_img = True, image_store=None, deadline=None, request_timeout: float = None):
 
-    if local_img:    
-        # Ensure we have a supported format
-        safe_image_path = ensure_supported_format(image_path)
-        
-        # Encode local file as base64 data URL
-        data_url = image_to_base64(safe_image_path)
-    else:
-        data_url = image_path
+    data_url = resolve_image_url(image_path, local_img, image_store)
     
     # Build multimodal input
     message = HumanMessage(
         content=[
-            {"type": "text", "text": f"Describe this design in detailed tags, including: niche, color, vibe, product type, design elements, theme. Return the result in raw JSON format, without code fences"},
+            {"type": "text", "text": TAGGING_PROMPT},
             {"type": "image_url", "image_url": {"url": data_url}}
         ]
     )
     
     # Call GPT
-    response = llm.invoke([message])
+    response = invoke_with_deadline(llm, [message], deadline, request_timeout)
     return response.content
 
+
+
+def parse_json_object(text: str):
+    """Parses a JSON object from an LLM answer, tolerating code fences and surrounding text."""
+    text = re.sub(r"^```(?:json)?|```$", "", text.strip(), flags=re.MULTILINE).strip()
+    start, end = text.find("{"), text.rfind("}") + 1
+    try:
+        return json.loads(text[start:end])
+    except ValueError:
+        return None
+
+def valid_tags(tags) -> bool:
+    """A tag answer is valid if it is a non-empty object covering at least half of TAG_FIELDS."""
+    if not isinstance(tags, dict) or not tags:
+        return False
+    keys = {re.sub(r"[_\s]+", " ", str(k)).strip().lower() for k in tags}
+    return sum(field in keys for field in TAG_FIELDS) * 2 >= len(TAG_FIELDS)
+
+def tagging_images_packed(
+    llm,
+    image_paths: list[str],
+    local_img: bool = True,
+    image_store=None,
+    pack_size: int = 4,
+    deadline=None,
+    request_timeout: float = None
+) -> list[str]:
+    """
+    Tags several images per request to share the instruction prompt between them.
+    Each image is sent with an ID and the model answers one JSON object keyed by ID.
+    Items whose answer is missing or fails `valid_tags` are re-tagged one image per request.
+    Returns the tags as raw JSON strings, in the order of `image_paths`; None for items
+    whose single-image request failed too, so the tags already obtained are kept.
+    """
+    results = [None] * len(image_paths)
+    for start in range(0, len(image_paths), pack_size):
+        pack = list(enumerate(image_paths[start:start + pack_size], start))
+        ids = [f"img_{index}" for index, _ in pack]
+        content = [{
+            "type": "text",
+            "text": PACKED_TAGGING_PROMPT.format(count=len(pack), first_id=ids[0]),
+        }]
+        try:
+            for image_id, (_, image_path) in zip(ids, pack):
+                content.append({"type": "text", "text": f"ID: {image_id}"})
+                content.append({"type": "image_url", "image_url": {"url": resolve_image_url(image_path, local_img, image_store)}})
+            response = invoke_with_deadline(llm, [HumanMessage(content=content)], deadline, request_timeout)
+        except Cancelled:
+            raise
+        except Exception as e:
+            print(f"Packed request failed, tagging {len(pack)} images one by one: {e}")
+            continue
+        answer = parse_json_object(response.content) or {}
+        for image_id, (index, _) in zip(ids, pack):
+            tags = answer.get(image_id)
+            if valid_tags(tags):
+                results[index] = json.dumps(tags, ensure_ascii=False)
+
+    # Fall back to single-image requests for rows the packed answer did not cover
+    for index, image_path in enumerate(image_paths):
+        if results[index] is None:
+            try:
+                results[index] = tagging_image_with_langchain(
+                    llm, image_path, local_img, image_store, deadline, request_timeout
+                )
+            except Cancelled:
+                raise
+            except Exception as e:
+                print(f"Tagging failed for {image_path}: {e}")
+    return results
@@ -0,0 +1,162 @@
+"""
+Async, memoized and streaming version of the joke / story / poem workflow from LangGraph.ipynb.
+
+The three branches run concurrently with `llm.ainvoke`, so end-to-end latency is the slowest
+branch rather than the sum. Each node result is cached by node name + hash of the state keys the
+node reads, the model name and the prompt template, so a repeated topic costs no LLM call and
+changing the model or a prompt never serves an old answer. `stream_workflow` yields every branch as soon
+as it finishes, before the aggregator runs.
+
+Usage (in a notebook):
+    workflow = build_parallel_workflow(llm, NodeCache("node_cache.json"))
+    async for node, update in stream_workflow(workflow, "cats"):
+        print(node, update)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from typing import TypedDict
+
+from langgraph.graph import END, START, StateGraph
+
+# Prompt templates of the LLM nodes; part of their cache keys
+PROMPTS = {
+    "call_llm_1": "Write a joke about {topic}",
+    "call_llm_2": "Write a story about {topic}",
+    "call_llm_3": "Write a poem about {topic}",
+}
+
+
+# Graph state
+class State(TypedDict):
+    topic: str
+    joke: str
+    story: str
+    poem: str
+    combined_output: str
+
+
+class NodeCache:
+    """Node results keyed by node name + hash of inputs, model and prompt, optionally persisted to a JSON file."""
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._results = {}
+        self._in_flight = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._results = json.load(f)
+
+    @staticmethod
+    def key(node: str, state: dict, input_keys, model: str = None, prompt: str = None) -> str:
+        inputs = {k: state.get(k) for k in input_keys}
+        keyed = {"inputs": inputs, "model": model, "prompt": prompt}
+        digest = hashlib.sha256(json.dumps(keyed, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return f"{node}:{digest}"
+
+    async def get_or_compute(self, key: str, compute):
+        if key in self._results:
+            self.hits += 1
+            return self._results[key]
+        # Identical requests running at the same time share one computation
+        if key in self._in_flight:
+            self.hits += 1
+            return await self._in_flight[key]
+        self.misses += 1
+        task = asyncio.ensure_future(compute())
+        self._in_flight[key] = task
+        try:
+            result = await task
+        finally:
+            self._in_flight.pop(key, None)
+        self._results[key] = result
+        self._save()
+        return result
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._results, f)
+        os.replace(tmp_path, self.path)
+
+
+def model_name(llm) -> str:
+    """Identifies the model behind `llm` for cache keys (e.g. ChatOpenAI's model_name)."""
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+
+
+def memoized(node: str, fn, cache: NodeCache, input_keys=("topic",), model: str = None, prompt: str = None):
+    """
+    Wraps an async node so its update is served from `cache` when the same inputs were seen
+    before with the same `model` and `prompt`.
+    """
+    if cache is None:
+        return fn
+
+    async def wrapper(state: State):
+        key = NodeCache.key(node, state, input_keys, model, prompt)
+        return await cache.get_or_compute(key, lambda: fn(state))
+
+    wrapper.__name__ = node
+    return wrapper
+
+
+def build_parallel_workflow(llm, cache: NodeCache = None):
+    """Builds the joke / story / poem graph with async, memoized LLM nodes."""
+
+    async def call_llm_1(state: State):
+        """First LLM call to generate initial joke"""
+        msg = await llm.ainvoke(PROMPTS["call_llm_1"].format(topic=state["topic"]))
+        return {"joke": msg.content}
+
+    async def call_llm_2(state: State):
+        """Second LLM call to generate story"""
+        msg = await llm.ainvoke(PROMPTS["call_llm_2"].format(topic=state["topic"]))
+        return {"story": msg.content}
+
+    async def call_llm_3(state: State):
+        """Third LLM call to generate poem"""
+        msg = await llm.ainvoke(PROMPTS["call_llm_3"].format(topic=state["topic"]))
+        return {"poem": msg.content}
+
+    def aggregator(state: State):
+        """Combine the joke and story into a single output"""
+        combined = f"Here's a story, joke, and poem about {state['topic']}!\n\n"
+        combined += f"STORY:\n{state['story']}\n\n"
+        combined += f"JOKE:\n{state['joke']}\n\n"
+        combined += f"POEM:\n{state['poem']}"
+        return {"combined_output": combined}
+
+    parallel_builder = StateGraph(State)
+    for name, fn in [("call_llm_1", call_llm_1), ("call_llm_2", call_llm_2), ("call_llm_3", call_llm_3)]:
+        parallel_builder.add_node(name, memoized(name, fn, cache, model=model_name(llm), prompt=PROMPTS[name]))
+        parallel_builder.add_edge(START, name)
+        parallel_builder.add_edge(name, "aggregator")
+    parallel_builder.add_node("aggregator", aggregator)
+    parallel_builder.add_edge("aggregator", END)
+    return parallel_builder.compile()
+
+
+async def stream_workflow(workflow, topic: str):
+    """Yields (node, update) as each node finishes; branches arrive in completion order."""
+    async for chunk in workflow.astream({"topic": topic}, stream_mode="updates"):
+        for node, update in chunk.items():
+            yield node, update
+
+
+async def run_workflow(workflow, topic: str) -> str:
+    """Prints each branch as soon as it is ready and returns the combined output."""
+    combined = ""
+    async for node, update in stream_workflow(workflow, topic):
+        if node == "aggregator":
+            combined = update["combined_output"]
+        else:
+            for key, value in update.items():
+                print(f"--- {key.upper()} ready ({node}) ---\n{value}\n")
+    return combined
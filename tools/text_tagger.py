@@ -0,0 +1,146 @@
+import json
+import re
+
+from langchain_core.messages import HumanMessage
+
+from tools.deadlines import Cancelled, invoke_with_deadline
+from tools.metadata_extractor import parse_json_object, valid_tags
+
+DESCRIPTION_TAGGING_PROMPT = (
+    "Here is a detailed description of a product design:\n\n{description}\n\n"
+    "Describe this design in detailed tags, including: niche, color, vibe, product type, "
+    "design elements, theme. Use only what the description states. "
+    "Return the result in raw JSON format, without code fences"
+)
+
+# --- Keyword vocabularies for the local extractor ---
+COLORS = [
+    "red", "crimson", "burgundy", "maroon", "pink", "blush", "orange", "coral", "peach", "yellow",
+    "gold", "golden", "mustard", "green", "sage", "olive", "emerald", "teal", "turquoise", "blue",
+    "navy", "sky blue", "royal blue", "purple", "lavender", "violet", "brown", "tan", "beige",
+    "cream", "ivory", "white", "black", "gray", "grey", "silver", "charcoal", "rainbow", "pastel",
+]
+VIBES = [
+    "cozy", "rustic", "vintage", "whimsical", "elegant", "playful", "serene", "cheerful", "festive",
+    "bohemian", "boho", "modern", "retro", "romantic", "calm", "warm", "charming", "tranquil",
+    "nostalgic", "classic", "spooky", "mystical", "peaceful", "inviting", "joyful", "bold",
+    "vibrant", "dreamy", "magical", "homey",
+]
+THEMES = {
+    "christmas": ["christmas", "santa", "reindeer", "snowman", "ornament", "xmas", "holly"],
+    "halloween": ["halloween", "pumpkin", "witch", "ghost", "bat", "skeleton", "jack-o-lantern"],
+    "floral": ["flower", "flowers", "floral", "rose", "roses", "sunflower", "sunflowers", "daisy", "blossom", "botanical", "tulip"],
+    "nature": ["tree", "trees", "forest", "leaf", "leaves", "mountain", "mountains", "woodland", "nature"],
+    "ocean": ["ocean", "sea", "beach", "wave", "waves", "coastal", "nautical", "turtle", "whale"],
+    "animals": ["cat", "cats", "dog", "dogs", "horse", "horses", "cow", "chicken", "rooster", "owl", "deer", "bear", "fox", "butterfly", "butterflies", "bird", "birds"],
+    "patriotic": ["patriotic", "american flag", "stars and stripes", "eagle", "usa"],
+    "western": ["western", "cowboy", "cowgirl", "rodeo"],
+    "farmhouse": ["farmhouse", "farm", "barn", "country"],
+    "faith": ["cross", "jesus", "faith", "angel", "bible", "prayer"],
+    "fantasy": ["dragon", "unicorn", "fairy", "mermaid", "phoenix"],
+    "seasonal": ["spring", "summer", "autumn", "fall", "winter", "thanksgiving", "easter", "valentine"],
+}
+DESIGN_ELEMENTS = [
+    "patchwork", "stitching", "quilting", "geometric", "stripes", "polka dots", "plaid", "checkered",
+    "mandala", "border", "hexagon", "stars", "star", "hearts", "heart", "paisley", "vines", "swirls",
+    "tiles", "diamonds", "circles", "feathers", "lettering", "tree of life", "silhouette", "ombre",
+]
+# Construction words that nearly every quilt description contains; they say nothing about the design
+GENERIC_ELEMENTS = {"stitching", "quilting", "patchwork", "border"}
+# Fields the description itself has to fill for the local tags to be trusted. "product type"
+# comes from the catalog and "theme" is derived from the niche words, so neither is evidence
+EVIDENCE_FIELDS = ["niche", "color", "vibe", "design elements"]
+PRODUCT_TYPES = [
+    "quilt blanket", "quilted table runner", "table runner", "quilt bed set", "bedding set",
+    "pillow case", "placemat", "placemats", "fleece blanket", "tree skirt", "doormat", "rug",
+    "round mat", "sofa blanket", "sleeping bag", "tapestry", "tablecloth", "quilt",
+]
+
+
+def _pattern(words):
+    """Whole-word, case-insensitive regex for a vocabulary; longer phrases win over their parts."""
+    words = sorted(words, key=len, reverse=True)
+    return re.compile(r"\b(" + "|".join(re.escape(w) for w in words) + r")\b", re.IGNORECASE)
+
+
+_COLOR_RE = _pattern(COLORS)
+_VIBE_RE = _pattern(VIBES)
+_ELEMENT_RE = _pattern(DESIGN_ELEMENTS)
+_PRODUCT_RE = _pattern(PRODUCT_TYPES)
+_THEME_RES = {theme: _pattern(words) for theme, words in THEMES.items()}
+
+
+def _unique(matches):
+    seen = []
+    for match in matches:
+        match = match.lower()
+        if match not in seen:
+            seen.append(match)
+    return seen
+
+
+def extract_tags_locally(description: str, product_type: str = None) -> tuple[dict, float]:
+    """
+    Derives structured tags from a description with keyword rules, without any LLM call.
+    Returns (tags, confidence) where confidence is the share of EVIDENCE_FIELDS the description
+    filled with specific words (generic construction words do not count).
+    """
+    themes, niche = [], []
+    for theme, pattern in _THEME_RES.items():
+        hits = _unique(pattern.findall(description))
+        if hits:
+            themes.append(theme)
+            niche.extend(hits)
+    products = _unique(_PRODUCT_RE.findall(description))
+
+    tags = {
+        "niche": niche[:5],
+        "color": _unique(_COLOR_RE.findall(description)),
+        "vibe": _unique(_VIBE_RE.findall(description)),
+        "product type": product_type or (products[0] if products else ""),
+        "design elements": _unique(_ELEMENT_RE.findall(description)),
+        "theme": themes,
+    }
+    tags = {field: value for field, value in tags.items() if value}
+    evidence = dict(tags, **{"design elements": [e for e in tags.get("design elements", []) if e not in GENERIC_ELEMENTS]})
+    return tags, sum(1 for field in EVIDENCE_FIELDS if evidence.get(field)) / len(EVIDENCE_FIELDS)
+
+
+def tagging_description_with_langchain(llm, description: str, deadline=None, request_timeout: float = None):
+    """Derives tags from a description with a text-only LLM call; returns a dict or None if invalid."""
+    message = HumanMessage(content=DESCRIPTION_TAGGING_PROMPT.format(description=description))
+    response = invoke_with_deadline(llm, [message], deadline, request_timeout)
+    tags = parse_json_object(response.content)
+    return tags if valid_tags(tags) else None
+
+
+def derive_tags_from_description(
+    description: str,
+    product_type: str = None,
+    text_llm=None,
+    min_confidence: float = 0.8,
+    deadline=None,
+    request_timeout: float = None
+):
+    """
+    Cheap tag derivation from an existing description, tried in order:
+    local keyword rules, then (if given) a small text-only model.
+    Returns the tags as a raw JSON string, or None when confidence stays low or the text
+    model call fails, in which case the caller should fall back to the image tagging call.
+    """
+    if not description:
+        return None
+    tags, confidence = extract_tags_locally(description, product_type)
+    if confidence >= min_confidence:
+        return json.dumps(tags, ensure_ascii=False)
+    if text_llm is not None:
+        try:
+            tags = tagging_description_with_langchain(text_llm, description, deadline, request_timeout)
+        except Cancelled:
+            raise
+        except Exception as e:
+            print(f"Text tagging failed, falling back to the image: {e}")
+            tags = None
+        if tags is not None:
+            return json.dumps(tags, ensure_ascii=False)
+    return None
@@ -0,0 +1,151 @@
+"""
+Tool-execution layer for the tool-calling agents in AI_agent_basic.ipynb and 5_Tool_Use_LangChain.ipynb.
+
+AgentExecutor runs the tool calls of one model turn one after another and recomputes every call.
+ToolExecutor instead:
+- memoizes deterministic tools by normalized arguments (`_normalize`, which the notebook's
+  search_information imports), with a per-tool TTL, and shares one call between identical requests in flight
+- runs all tool calls of one model turn concurrently, up to `max_concurrency`
+- keeps per-tool latency stats
+
+Usage (in a notebook):
+    executor = ToolExecutor([search_information], cacheable={"search_information": 600})
+    answer = await run_agent(llm, executor, "What is the capital of France and the weather in London?")
+    print(executor.stats_report())
+"""
+
+import asyncio
+import json
+import re
+import time
+from dataclasses import dataclass
+
+from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
+
+
+def _normalize(s: str) -> str:
+    # lowercase, strip punctuation & extra spaces
+    s = s.lower()
+    s = re.sub(r"[^\w\s]", "", s)
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def cache_key(tool_name: str, args: dict) -> str:
+    normalized = {k: _normalize(v) if isinstance(v, str) else v for k, v in args.items()}
+    return f"{tool_name}:{json.dumps(normalized, sort_keys=True, default=str)}"
+
+
+@dataclass
+class ToolStats:
+    calls: int = 0
+    cache_hits: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        executed = self.calls - self.cache_hits
+        return self.total_seconds / executed if executed else 0.0
+
+
+class ToolExecutor:
+    """
+    Executes LangChain tool calls ({"name", "args", "id"}) and returns ToolMessages.
+    `cacheable` maps the names of deterministic tools to their cache TTL in seconds
+    (a set of names uses `default_ttl`); other tools always run.
+    """
+
+    def __init__(self, tools, cacheable=None, default_ttl: float = 300, max_concurrency: int = 8):
+        self.tools = {t.name: t for t in tools}
+        if isinstance(cacheable, (set, list, tuple)):
+            cacheable = {name: default_ttl for name in cacheable}
+        self.ttls = dict(cacheable or {})
+        self.max_concurrency = max_concurrency
+        self.stats = {name: ToolStats() for name in self.tools}
+        self._cache = {}  # key -> (expires_at, content)
+        self._in_flight = {}
+
+    async def _run(self, name: str, args: dict) -> str:
+        started = time.perf_counter()
+        try:
+            result = await self.tools[name].ainvoke(args)
+        finally:
+            elapsed = time.perf_counter() - started
+            stats = self.stats[name]
+            stats.total_seconds += elapsed
+            stats.max_seconds = max(stats.max_seconds, elapsed)
+        return result if isinstance(result, str) else json.dumps(result, default=str)
+
+    async def _cached(self, name: str, args: dict) -> str:
+        key = cache_key(name, args)
+        entry = self._cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            self.stats[name].cache_hits += 1
+            return entry[1]
+        # Identical calls in the same turn (or concurrent turns) share one execution
+        if key in self._in_flight:
+            self.stats[name].cache_hits += 1
+            return await self._in_flight[key]
+        task = asyncio.ensure_future(self._run(name, args))
+        self._in_flight[key] = task
+        try:
+            content = await task
+        finally:
+            self._in_flight.pop(key, None)
+        self._cache[key] = (time.monotonic() + self.ttls[name], content)
+        return content
+
+    async def ainvoke_tool_call(self, tool_call: dict) -> ToolMessage:
+        name, args = tool_call["name"], tool_call.get("args") or {}
+        if name not in self.tools:
+            return ToolMessage(content=f"Error: unknown tool '{name}'.", tool_call_id=tool_call["id"], name=name, status="error")
+        self.stats[name].calls += 1
+        try:
+            if name in self.ttls:
+                content = await self._cached(name, args)
+            else:
+                content = await self._run(name, args)
+        except Exception as e:
+            self.stats[name].errors += 1
+            return ToolMessage(content=f"Error: {e}", tool_call_id=tool_call["id"], name=name, status="error")
+        return ToolMessage(content=content, tool_call_id=tool_call["id"], name=name)
+
+    async def aexecute(self, tool_calls) -> list[ToolMessage]:
+        """Runs independent tool calls from one model turn concurrently; results keep the call order."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(tool_call):
+            async with semaphore:
+                return await self.ainvoke_tool_call(tool_call)
+
+        return list(await asyncio.gather(*(run(c) for c in tool_calls)))
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def stats_report(self) -> str:
+        lines = [f"{'tool':<24} {'calls':>6} {'cached':>6} {'errors':>6} {'mean ms':>8} {'max ms':>8}"]
+        for name, s in self.stats.items():
+            lines.append(f"{name:<24} {s.calls:>6} {s.cache_hits:>6} {s.errors:>6} {s.mean_seconds * 1000:>8.1f} {s.max_seconds * 1000:>8.1f}")
+        return "\n".join(lines)
+
+
+async def run_agent(
+    llm,
+    executor: ToolExecutor,
+    query: str,
+    system_prompt: str = "You are a helpful assistant. If a tool is relevant, call it; otherwise answer directly.",
+    max_turns: int = 5,
+) -> str:
+    """Tool-calling loop like AgentExecutor, but each turn's tool calls run through `executor`."""
+    model = llm.bind_tools(list(executor.tools.values()))
+    messages = [SystemMessage(content=system_prompt), HumanMessage(content=query)]
+    for _ in range(max_turns):
+        response = await model.ainvoke(messages)
+        messages.append(response)
+        if not response.tool_calls:
+            return response.content
+        messages.extend(await executor.aexecute(response.tool_calls))
+    # Out of turns: ask for an answer from what the tools returned so far
+    return (await llm.ainvoke(messages)).content